@@ -6,6 +6,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session
 
+from app.core.auth_cache import auth_cache
 from app.core.security import decode_access_token
 from app.db.session import get_session
 from app.models.user import User
@@ -20,22 +21,31 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 def get_current_user(
         session: Session = Depends(get_session), token: str = Depends(oauth2_scheme)
 ) -> User:
-    # Decode token to get the payload
-    payload = decode_access_token(token)
-
-    if not payload or not payload.sub:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
-    
-    user = session.get(User, int(payload.sub))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
+    # Fast path: token already verified recently (see app/core/auth_cache.py)
+    user_id = auth_cache.user_id_for_token(token)
+
+    if user_id is None:
+        # Decode token to get the payload
+        payload = decode_access_token(token)
+
+        if not payload or not payload.sub:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        user_id = int(payload.sub)
+        auth_cache.remember_token(token, user_id, payload.exp)
+
+    user = auth_cache.get_user(user_id)
+    if user is None:
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        auth_cache.remember_user(user)
+
     return user
     
@@ -9,7 +9,7 @@ from sqlmodel import Session, select
 
 # Import dependencies, schemas, models, security functions.
 # from app.api import deps.
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.core.security import create_access_token, get_password_hash_async, verify_password_async
 from app.db.session import get_session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserRead
@@ -43,8 +43,12 @@ async def register_user(
             detail=" A User with this email already exists.",
         )
     
-    # Hash the plain PW from the reqauest using security utility.
-    hashed_password = get_password_hash(user_in.password)
+    # Release the pooled DB connection while bcrypt runs, so concurrent
+    # registrations/logins cannot exhaust the connection pool.
+    session.close()
+
+    # Hash the plain PW from the reqauest using security utility (off the event loop).
+    hashed_password = await get_password_hash_async(user_in.password)
 
     # Create instance model for new User db.
     db_user = User(email=user_in.email, hashed_password=hashed_password, name=user_in.name)
@@ -70,8 +74,10 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends() # [[ Can reuse UserCreate schema for login credentails ]]
 ):
     user = session.exec(select(User).where(User.email == form_data.username)).first()
+    # Loaded attributes stay readable after close(); see register_user.
+    session.close()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -2,10 +2,34 @@
 
 from fastapi import APIRouter, status
 
-from app.core.queue import q
+from app.core.queue import enqueue_workflow_batches, q
+from app.schemas.webhook import WebhookBatchQueued, WebhookBatchTrigger
 
 router = APIRouter()
 
+# Declared before "/{workflow_id}" so "batch" is not parsed as an id.
+@router.post(
+    "/batch",
+    response_model=WebhookBatchQueued,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Trigger many workflows asynchronously",
+    description="Queue runs for several workflow ids with a single pipelined Redis call.",
+)
+
+# --- Bulk Webhook Endpoint ---
+async def trigger_workflows_batch(trigger_in: WebhookBatchTrigger) -> WebhookBatchQueued:
+    """
+    [[[ Ids are grouped into process_workflow_batch jobs (WORKFLOW_BATCH_SIZE each),
+     so the worker loads definitions and writes runs in batches too. ]]]
+    """
+    jobs = enqueue_workflow_batches(trigger_in.workflow_ids)
+
+    return WebhookBatchQueued(
+        message="Workflow executions have been queued.",
+        queued=len(trigger_in.workflow_ids),
+        jobs=len(jobs),
+    )
+
 @router.post(
     "/{workflow_id}",
     status_code=status.HTTP_202_ACCEPTED,
@@ -1,19 +1,46 @@
 # Workflow API CRUD Endpoints
 from __future__ import annotations
 
-from typing import List, Optional, Any, Dict
+import base64
+from datetime import datetime
+from typing import List, Optional, Any, Dict, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy import desc, func
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, desc, or_
 from sqlmodel import Session, select
 
 from app.api.v1.deps import get_current_user
+from app.core.blob_store import blob_store, iter_blob_refs
 from app.db.session import get_session
 from app.models.user import User
-from app.models.workflow import Workflow, WorkflowRun
-from app.schemas.workflow import WorkflowCreate, WorkflowRead, WorkflowRunRead
+from app.engine.run_summary import STATUS_COLUMNS
+from app.models.workflow import Workflow, WorkflowRun, WorkflowRunSummary
+from app.schemas.workflow import WorkflowCreate, WorkflowRead, WorkflowRunRead, WorkflowRunSummaryRead
 
 router = APIRouter()
 
+# --- Keyset cursor helpers (runs are ordered by created_at DESC, id DESC) ---
+def encode_run_cursor(run: WorkflowRun) -> str:
+    raw = f"{run.created_at.isoformat()}|{run.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_run_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_raw, id_raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_raw), int(id_raw)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid cursor")
+
+# --- O(1) run counts from the incrementally maintained summary row ---
+def count_runs(session: Session, workflow_id: int, status_filter: Optional[str]) -> int:
+    summary = session.get(WorkflowRunSummary, workflow_id)
+    if summary is None:
+        return 0
+    if not status_filter:
+        return summary.total_count
+    column = STATUS_COLUMNS.get(status_filter)
+    return int(getattr(summary, column)) if column else 0
+
 # === Create Workflow ===
 @router.post(
     "/",
@@ -96,13 +123,18 @@ async def read_workflow_runs(
     workflow_id: int,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     status_filter: Optional[str] = None,
+    response: Response,
 ) -> List[WorkflowRunRead]:
     """Retrieve the execution history (runs) for a specific workflow.
 
-    - Paginates with limit/offset (defaults to 50 items).
-    - Optionally filters by run status (e.g., "Success", "Failed").
-    - Orders newest first by created_at when available (falls back to id).
+    - Paginates with a keyset ``cursor`` (preferred): pass the ``X-Next-Cursor``
+      response header back to fetch the next page. ``offset`` still works when no
+      cursor is given, but gets slower the deeper it goes.
+    - Page size is ``limit`` (defaults to 50 items).
+    - Optionally filters by run status (e.g., "success", "failed").
+    - Orders newest first by created_at, then id.
     """
 
     # Ensure workflow exists and belongs to current user
@@ -125,14 +157,20 @@ async def read_workflow_runs(
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid status_filter. Allowed: {sorted(valid_statuses)}")
         stmt = stmt.where(WorkflowRun.status == status_filter)
 
-    # Prefer created_at desc if the model/table provides it; otherwise fall back to id desc
-    if hasattr(WorkflowRun, "created_at"):
-        order_col: Any = getattr(WorkflowRun, "created_at")
-    else:
-        order_col: Any = getattr(WorkflowRun, "id")
-    stmt = stmt.order_by(desc(order_col))
+    # created_at DESC, id DESC matches ix_workflowrun_workflow_created_id (ties broken by id)
+    created_col: Any = getattr(WorkflowRun, "created_at")
+    id_col: Any = getattr(WorkflowRun, "id")
+    stmt = stmt.order_by(desc(created_col), desc(id_col))
+
+    if cursor:
+        cursor_created, cursor_id = decode_run_cursor(cursor)
+        stmt = stmt.where(or_(created_col < cursor_created, and_(created_col == cursor_created, id_col < cursor_id)))
+    elif offset:
+        stmt = stmt.offset(offset)
 
-    runs = session.exec(stmt.offset(offset).limit(limit)).all()
+    runs = session.exec(stmt.limit(limit)).all()
+    if len(runs) == limit:
+        response.headers["X-Next-Cursor"] = encode_run_cursor(runs[-1])
     # For total counts, use the HEAD or /runs/meta endpoint
     return [WorkflowRunRead.model_validate(r) for r in runs]
 
@@ -159,13 +197,8 @@ async def read_workflow_runs_meta(
             detail="Workflow not found",
         )
 
-    stmt = select(func.count()).select_from(WorkflowRun).where(WorkflowRun.workflow_id == workflow_id)
-    if status_filter:
-        stmt = stmt.where(WorkflowRun.status == status_filter)
-
-    total = session.exec(stmt).one()
-    # session.exec(...).one() returns a scalar in SQLModel; ensure int
-    return {"total": int(total)}
+    # Served from WorkflowRunSummary (maintained by the worker) instead of COUNT(*)
+    return {"total": count_runs(session, workflow_id, status_filter)}
 
 
 # --- History: HEAD for total count header ---
@@ -188,12 +221,79 @@ async def head_workflow_runs(
         # For HEAD, still use 404 if not found
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Workflow not found")
 
-    stmt = select(func.count()).select_from(WorkflowRun).where(WorkflowRun.workflow_id == workflow_id)
-    if status_filter:
-        stmt = stmt.where(WorkflowRun.status == status_filter)
-
-    total = session.exec(stmt).one()
-    response.headers["X-Total-Count"] = str(int(total))
+    total = count_runs(session, workflow_id, status_filter)
+    response.headers["X-Total-Count"] = str(total)
     # No body for HEAD; 204 No Content is appropriate
     response.status_code = status.HTTP_204_NO_CONTENT
-    return response
\ No newline at end of file
+    return response
+
+
+# --- History: summary (counts by status, last run, average duration) ---
+@router.get(
+    "/{workflow_id}/runs/summary",
+    response_model=WorkflowRunSummaryRead,
+    summary="Runs summary",
+    description="Return run counts by status, last run time and average duration for a workflow.",
+)
+async def read_workflow_runs_summary(
+    *,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+    workflow_id: int,
+) -> WorkflowRunSummaryRead:
+    """Dashboard numbers in O(1): a single primary-key lookup on WorkflowRunSummary."""
+    workflow = session.get(Workflow, workflow_id)
+    if not workflow or workflow.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Workflow not found")
+
+    summary = session.get(WorkflowRunSummary, workflow_id) or WorkflowRunSummary(workflow_id=workflow_id)
+    return WorkflowRunSummaryRead(
+        workflow_id=workflow_id,
+        total=summary.total_count,
+        counts={value: int(getattr(summary, column)) for value, column in STATUS_COLUMNS.items()},
+        last_run_at=summary.last_run_at,
+        avg_duration_ms=(summary.duration_ms_total / summary.finished_count) if summary.finished_count else None,
+    )
+
+
+# --- History: lazily load a large node output stored outside the run row ---
+@router.get(
+    "/{workflow_id}/runs/{run_id}/blobs/{digest}",
+    summary="Download a run output blob",
+    description="Stream a node output that exceeded NODE_OUTPUT_MAX_BYTES and was stored in the blob store.",
+)
+async def read_workflow_run_blob(
+    *,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+    workflow_id: int,
+    run_id: int,
+    digest: str,
+) -> StreamingResponse:
+    """Blobs are only served through a run that references them (``{"$blob": digest}`` in its logs)."""
+    workflow = session.get(Workflow, workflow_id)
+    if not workflow or workflow.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Workflow not found")
+
+    run = session.get(WorkflowRun, run_id)
+    if not run or run.workflow_id != workflow_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+
+    ref = next((r for r in iter_blob_refs(run.logs) if r["$blob"] == digest), None)
+    if ref is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    try:
+        stream = blob_store.open(digest)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Blob no longer available")
+
+    def chunks():
+        with stream:
+            while chunk := stream.read(64 * 1024):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=ref.get("contentType") or "application/octet-stream",
+        headers={"Content-Length": str(ref["size"])} if isinstance(ref.get("size"), int) else None,
+    )
@@ -0,0 +1,129 @@
+# :Modules: Authentication Cache
+"""TTL- and size-bounded cache for the authenticated request path.
+
+Two maps, both LRU with a TTL:
+- verified token -> user id (never outlives the token's own ``exp``)
+- user id        -> user principal (column values of the ``User`` row)
+
+Principals are dropped whenever a ``User`` row is updated or deleted through
+the ORM in this process; other processes see changes after at most
+``AUTH_CACHE_TTL_SECONDS``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.user import User
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Thread-safe LRU map whose entries also expire after a per-entry deadline."""
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self.maxsize = max(1, maxsize)
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> Optional[V]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: K, value: V, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+class AuthCache:
+    """Verified-token and user-principal caches used by ``deps.get_current_user``."""
+
+    def __init__(self, enabled: bool, maxsize: int, ttl_seconds: float) -> None:
+        self.enabled = enabled
+        self.tokens: TTLCache[str, int] = TTLCache(maxsize, ttl_seconds)
+        self.users: TTLCache[int, Dict[str, Any]] = TTLCache(maxsize, ttl_seconds)
+
+    # --- Tokens ---
+    def user_id_for_token(self, token: str) -> Optional[int]:
+        return self.tokens.get(token) if self.enabled else None
+
+    def remember_token(self, token: str, user_id: int, expires_at: Optional[int]) -> None:
+        if not self.enabled:
+            return
+        # Never cache past the token's own expiry.
+        remaining = (expires_at - time.time()) if expires_at else None
+        self.tokens.set(token, user_id, ttl_seconds=remaining)
+
+    # --- Principals ---
+    def get_user(self, user_id: int) -> Optional[User]:
+        if not self.enabled:
+            return None
+        data = self.users.get(user_id)
+        # A fresh, session-less instance per request so callers cannot share state.
+        return User(**data) if data is not None else None
+
+    def remember_user(self, user: User) -> None:
+        if self.enabled and user.id is not None:
+            self.users.set(user.id, user.model_dump())
+
+    def invalidate_user(self, user_id: Optional[int]) -> None:
+        if user_id is not None:
+            self.users.pop(user_id)
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.users.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "tokens": self.tokens.stats(), "users": self.users.stats()}
+
+
+auth_cache = AuthCache(
+    enabled=settings.AUTH_CACHE_ENABLED,
+    maxsize=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+
+# --- Invalidation: any ORM write to a User row drops its cached principal ---
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_principal(mapper: Any, connection: Any, target: User) -> None:
+    auth_cache.invalidate_user(target.id)
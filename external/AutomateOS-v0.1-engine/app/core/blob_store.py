@@ -0,0 +1,179 @@
+# :Modules: Content-Addressed Blob Store
+"""Local, content-addressed storage for node outputs that exceed their budget.
+
+Blobs are keyed by the SHA-256 of their raw bytes (so identical payloads are
+stored once) and optionally gzip-compressed on disk. Orchestrator state and
+``WorkflowRun.logs`` only keep a small reference dict:
+
+    {"$blob": "sha256:<hex>", "size": 123456, "contentType": "application/json",
+     "compressed": true, "preview": "<first bytes as text>"}
+
+Readers resolve references explicitly via :meth:`BlobStore.open`; nothing is
+loaded from disk unless asked for.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+from app.core.config import BASE_DIR, settings
+
+BLOB_KEY = "$blob"
+_DIGEST_RE = re.compile(r"^sha256:[0-9a-f]{64}$")
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get(BLOB_KEY), str)
+
+
+def iter_blob_refs(value: Any) -> Iterator[Dict[str, Any]]:
+    """Yield every blob reference nested anywhere inside ``value``."""
+    if is_blob_ref(value):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_blob_refs(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_blob_refs(item)
+
+
+class BlobWriter:
+    """Streams bytes into a temp file while hashing; ``commit`` moves it into place."""
+
+    def __init__(self, store: "BlobStore") -> None:
+        self._store = store
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self._head = bytearray()
+        tmp_dir = store.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = tmp_dir / f"{uuid.uuid4().hex}.part"
+        self._raw: BinaryIO = open(self._tmp_path, "wb")
+        self._out: BinaryIO = gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0) if store.compress else self._raw  # type: ignore[assignment]
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        if len(self._head) < self._store.preview_bytes:
+            self._head.extend(chunk[: self._store.preview_bytes - len(self._head)])
+        self._out.write(chunk)
+
+    def commit(self, content_type: str = "application/octet-stream") -> Dict[str, Any]:
+        if self._out is not self._raw:
+            self._out.close()
+        self._raw.close()
+        digest = f"sha256:{self._hash.hexdigest()}"
+        final_path = self._store.path_for(digest)
+        if final_path.exists():
+            # Deduplicated: same content already stored.
+            self._tmp_path.unlink(missing_ok=True)
+        else:
+            final_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp_path, final_path)
+        return {
+            BLOB_KEY: digest,
+            "size": self.size,
+            "contentType": content_type,
+            "compressed": self._store.compress,
+            "preview": bytes(self._head).decode("utf-8", errors="replace"),
+        }
+
+    def abort(self) -> None:
+        try:
+            self._out.close()
+            self._raw.close()
+        finally:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+class BlobStore:
+    """Filesystem blob store: ``<root>/<aa>/<bb>/<hex>[.gz]``."""
+
+    def __init__(self, root: str | Path, compress: bool = True, preview_bytes: int = 1024) -> None:
+        self.root = Path(root)
+        self.compress = compress
+        self.preview_bytes = max(0, preview_bytes)
+
+    def path_for(self, digest: str) -> Path:
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"invalid blob digest '{digest}'")
+        hexdigest = digest.split(":", 1)[1]
+        suffix = ".gz" if self.compress else ""
+        return self.root / hexdigest[:2] / hexdigest[2:4] / f"{hexdigest}{suffix}"
+
+    def writer(self) -> BlobWriter:
+        return BlobWriter(self)
+
+    def put_bytes(self, data: bytes, content_type: str = "application/octet-stream") -> Dict[str, Any]:
+        writer = self.writer()
+        try:
+            writer.write(data)
+        except Exception:
+            writer.abort()
+            raise
+        return writer.commit(content_type)
+
+    def _locate(self, digest: str) -> Optional[Path]:
+        # Blobs written with the other compression setting are still readable.
+        path = self.path_for(digest)
+        alternate = path.with_suffix("") if path.suffix == ".gz" else path.with_name(path.name + ".gz")
+        for candidate in (path, alternate):
+            if candidate.exists():
+                return candidate
+        return None
+
+    def exists(self, digest: str) -> bool:
+        return self._locate(digest) is not None
+
+    def open(self, digest: str) -> BinaryIO:
+        """Open a blob for reading (decompressed). Raises FileNotFoundError if missing."""
+        path = self._locate(digest)
+        if path is None:
+            raise FileNotFoundError(digest)
+        if path.suffix == ".gz":
+            return gzip.open(path, "rb")  # type: ignore[return-value]
+        return open(path, "rb")
+
+    def read_bytes(self, digest: str) -> bytes:
+        with self.open(digest) as fh:
+            return fh.read()
+
+
+def cap_output(output: Dict[str, Any], max_bytes: int, store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """Keep a node output within ``max_bytes`` of JSON by moving its largest values to blobs.
+
+    Top-level keys are preserved so downstream nodes can still read small fields
+    (e.g. ``status_code``); only the oversized values become blob references.
+    """
+    if max_bytes <= 0:
+        return output
+    encoded = {key: json.dumps(value, ensure_ascii=False, default=str).encode("utf-8") for key, value in output.items()}
+    total = sum(len(data) for data in encoded.values())
+    if total <= max_bytes:
+        return output
+
+    store = store or blob_store
+    capped = dict(output)
+    for key in sorted(encoded, key=lambda k: len(encoded[k]), reverse=True):
+        if total <= max_bytes or is_blob_ref(capped[key]) or len(encoded[key]) <= store.preview_bytes:
+            break
+        ref = store.put_bytes(encoded[key], content_type="application/json")
+        capped[key] = ref
+        total += len(json.dumps(ref, ensure_ascii=False).encode("utf-8")) - len(encoded[key])
+    return capped
+
+
+blob_store = BlobStore(
+    root=settings.BLOB_STORE_DIR or (BASE_DIR / "blobs"),
+    compress=settings.BLOB_STORE_COMPRESS,
+    preview_bytes=settings.NODE_OUTPUT_PREVIEW_BYTES,
+)
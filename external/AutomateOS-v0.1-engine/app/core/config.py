@@ -10,6 +10,56 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Engine: max number of independent steps executed at once within a single run
+    WORKFLOW_MAX_CONCURRENCY: int = 4
+    # Engine: compiled workflow plans kept per process (LRU)
+    WORKFLOW_PLAN_CACHE_SIZE: int = 256
+
+    # Shared HTTP client pool (app/core/http_client.py)
+    HTTP_TIMEOUT_SECONDS: float = 30.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP2_ENABLED: bool = False
+
+    # /v1/execute: background runs and the bounded in-memory run store
+    ENGINE_MAX_CONCURRENT_RUNS: int = 16
+    ENGINE_MAX_PENDING_RUNS: int = 256  # queued + running; /v1/execute answers 429 beyond this
+    RUN_STORE_MAX_RUNS: int = 1000
+    RUN_STORE_TTL_SECONDS: float = 3600.0
+    RUN_STORE_SPILL_PATH: str = ""  # e.g. "engine_runs.db" to keep evicted finished runs on disk
+
+    # Bulk webhook triggers: workflow ids per worker job (one batched DB round trip each)
+    WORKFLOW_BATCH_SIZE: int = 50
+    WEBHOOK_BATCH_MAX_IDS: int = 1000
+    WORKER_DRAIN_BATCH: bool = True  # worker runs queued single-workflow jobs together, up to WORKFLOW_BATCH_SIZE
+
+    # Auth: cache of verified tokens / user principals, and the bcrypt thread pool
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    BCRYPT_THREADS: int = 4  # 0 = hash/verify inline (blocks the event loop)
+
+    # Node outputs: per-node budget; larger payloads go to the content-addressed blob store
+    NODE_OUTPUT_MAX_BYTES: int = 262144  # 0 = unlimited (keep everything in state/logs)
+    NODE_OUTPUT_PREVIEW_BYTES: int = 1024
+    BLOB_STORE_DIR: str = ""  # default: <project root>/blobs (share it between api and worker)
+    BLOB_STORE_COMPRESS: bool = True
+
+    # Structured event log (app/core/structured_log.py): batched background writer
+    LOG_LEVEL: str = "info"  # debug | info | warning | error
+    LOG_SAMPLE_RATE: float = 1.0  # fraction of debug/info events kept; warnings/errors always kept
+    LOG_BATCH_SIZE: int = 100
+    LOG_FLUSH_INTERVAL_SECONDS: float = 0.5
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped (counted) rather than blocking
+    LOG_REQUEST_HEADERS: bool = False  # include (masked) request headers in request.in events
+
+    # Metrics (app/core/metrics.py): GET /metrics on the API; optional port for each worker
+    METRICS_ENABLED: bool = True
+    WORKER_METRICS_PORT: int = 0  # 0 = no metrics server in the worker
+
     model_config = SettingsConfigDict(
         env_file=str(ENV_FILE),
         env_file_encoding="utf-8",
@@ -17,4 +67,4 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -0,0 +1,232 @@
+# :Modules: Shared HTTP Client Pool
+"""Process-wide, keep-alive HTTP clients for nodes and the /v1/execute path.
+
+One ``httpx.Client`` (for worker/orchestrator threads) and one
+``httpx.AsyncClient`` (for async FastAPI handlers) are created lazily and
+reused, so TCP/TLS connections survive between steps and runs. Requests go
+through :meth:`HttpClientManager.stream` (nodes read the body themselves) /
+:meth:`HttpClientManager.arequest`, which add a per-host concurrency cap and
+collect pool metrics.
+
+Lifecycle: closed by the FastAPI lifespan (``aclose``) and by ``worker.py``
+on exit (``close``). Clients inherited across ``fork()`` are dropped in the child.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from importlib.util import find_spec
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.structured_log import log_event
+
+
+class PoolStats:
+    """Counters for connection reuse and per-host slot waits (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.errors = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def record(self, wait_ms: float, opened_connection: bool, failed: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.new_connections += int(opened_connection)
+            self.errors += int(failed)
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                "requests": self.requests,
+                "newConnections": self.new_connections,
+                "reusedConnections": reused,
+                "reuseRate": round(reused / self.requests, 4) if self.requests else 0.0,
+                "errors": self.errors,
+                "waitMsAvg": round(self.wait_ms_total / self.requests, 3) if self.requests else 0.0,
+                "waitMsMax": round(self.wait_ms_max, 3),
+            }
+
+
+class HttpClientManager:
+    """Owns the shared sync/async httpx clients and their per-host limits."""
+
+    def __init__(
+        self,
+        *,
+        timeout: float = settings.HTTP_TIMEOUT_SECONDS,
+        connect_timeout: float = settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        max_connections: int = settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        max_connections_per_host: int = settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+        http2: bool = settings.HTTP2_ENABLED,
+    ) -> None:
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_connections_per_host = max(1, max_connections_per_host)
+        # HTTP/2 needs the optional 'h2' package (pip install httpx[http2]).
+        self.http2 = bool(http2) and find_spec("h2") is not None
+        if http2 and not self.http2:
+            log_event("http.client.http2_unavailable", level="warning", reason="'h2' is not installed; using HTTP/1.1")
+
+        self.sync_stats = PoolStats()
+        self.async_stats = PoolStats()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._client: Optional[httpx.Client] = None
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._reset_async()
+
+    def _reset_async(self) -> None:
+        # The async client and its semaphores belong to one event loop.
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    # --- Clients ---
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(timeout=self.timeout, limits=self.limits, http2=self.http2)
+        return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=self.http2)
+        return self._async_client
+
+    # --- Requests ---
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs: Any) -> Iterator[httpx.Response]:
+        """Sync request through the shared pool, bounded per host; the caller reads the body.
+
+        The per-host slot is held until the block exits, i.e. until the body is consumed.
+        """
+        client = self.client()
+        slot = self._host_slot(url)
+        opened: Dict[str, bool] = {"connection": False}
+
+        def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.started":
+                opened["connection"] = True
+
+        waited = time.perf_counter()
+        with slot:
+            wait_ms = (time.perf_counter() - waited) * 1000
+            failed = True
+            try:
+                with client.stream(method, url, extensions={"trace": trace}, **kwargs) as response:
+                    yield response
+                failed = False
+            finally:
+                self.sync_stats.record(wait_ms, opened["connection"], failed)
+
+    async def arequest(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Async request through the shared pool, bounded per host."""
+        client = self.async_client()
+        slot = self._async_host_slot(url)
+        opened: Dict[str, bool] = {"connection": False}
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.started":
+                opened["connection"] = True
+
+        waited = time.perf_counter()
+        async with slot:
+            wait_ms = (time.perf_counter() - waited) * 1000
+            failed = True
+            try:
+                response = await client.request(method, url, extensions={"trace": trace}, **kwargs)
+                failed = False
+                return response
+            finally:
+                self.async_stats.record(wait_ms, opened["connection"], failed)
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = _host_key(url)
+        slot = self._host_slots.get(host)
+        if slot is None:
+            with self._lock:
+                slot = self._host_slots.setdefault(host, threading.BoundedSemaphore(self.max_connections_per_host))
+        return slot
+
+    def _async_host_slot(self, url: str) -> asyncio.Semaphore:
+        # Only touched from the event loop thread, so no lock is needed.
+        host = _host_key(url)
+        slot = self._async_host_slots.get(host)
+        if slot is None:
+            slot = self._async_host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return slot
+
+    # --- Metrics ---
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sync": {**self.sync_stats.snapshot(), "openConnections": _open_connections(self._client)},
+            "async": {**self.async_stats.snapshot(), "openConnections": _open_connections(self._async_client)},
+            "http2": self.http2,
+        }
+
+    # --- Lifecycle ---
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        with self._lock:
+            async_client = self._async_client
+            # A restarted app (new event loop) must not reuse loop-bound semaphores.
+            self._reset_async()
+        if async_client is not None:
+            await async_client.aclose()
+
+    def after_fork(self) -> None:
+        # Sockets inherited from the parent must not be shared; start with fresh pools.
+        self._lock = threading.Lock()
+        self._reset()
+
+
+def _host_key(url: str) -> str:
+    try:
+        parsed = httpx.URL(url)
+        return f"{parsed.scheme}://{parsed.host}:{parsed.port or ''}"
+    except Exception:
+        return url
+
+
+def _open_connections(client: httpx.Client | httpx.AsyncClient | None) -> int:
+    # httpx does not expose pool state publicly; read httpcore's pool when available.
+    if client is None:
+        return 0
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    return len(getattr(pool, "connections", []) or [])
+
+
+# Process-wide manager shared by HttpRequestNode and the /v1/execute handler.
+http_clients = HttpClientManager()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=http_clients.after_fork)
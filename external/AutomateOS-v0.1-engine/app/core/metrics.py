@@ -0,0 +1,259 @@
+# :Modules: In-Process Metrics
+"""Small, dependency-free metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms are labelled and thread-safe; recording is a
+dict lookup plus an add under a lock. Values that already live elsewhere
+(queue depth, run store, HTTP pool, caches) are read at scrape time through
+collectors registered with :meth:`MetricsRegistry.register_collector`;
+``process_gauges`` and ``queue_depth_collector`` are shared by the API and the worker.
+
+Served by ``GET /metrics`` on the API and, when ``WORKER_METRICS_PORT`` is set,
+by a tiny HTTP server inside each worker.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers fast in-process steps up to slow upstream HTTP calls.
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, description, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors yielding ``(name, help, labels, value)`` gauges."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, description: str, labelnames: Sequence[str], **kwargs: object) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, labelnames, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"metric '{name}' is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, description, labelnames)  # type: ignore[return-value]
+
+    def gauge(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, description, labelnames)  # type: ignore[return-value]
+
+    def histogram(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, labelnames, buckets=buckets)  # type: ignore[return-value]
+
+    def register_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+
+        # Group collected gauges by name: a metric family's samples must be contiguous.
+        families: Dict[str, Tuple[str, List[str]]] = {}
+        for collector in collectors:
+            samples: List[Tuple[str, str, Dict[str, str], float]] = []
+            try:
+                samples.extend(collector())
+            except Exception:
+                # A failing source (e.g. Redis down) must not break the scrape.
+                pass
+            for name, description, labels, value in samples:
+                family = families.setdefault(name, (description, []))
+                family[1].append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        for name, (description, samples_text) in families.items():
+            lines.extend([f"# HELP {name} {description}", f"# TYPE {name} gauge"])
+            lines.extend(samples_text)
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port: int, registry: Optional[MetricsRegistry] = None, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``registry`` at ``/metrics`` from a daemon thread (for processes without FastAPI)."""
+    registry = registry or metrics
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# --- Shared collectors (registered by main.py and worker.py) ---
+def process_gauges() -> Iterable[Tuple[str, str, Dict[str, str], float]]:
+    """Scrape-time gauges for sources every process has: HTTP pool, plan cache, event log."""
+    # Imported here: this module stays importable from anywhere (nodes, orchestrator) without cycles.
+    from app.core.http_client import http_clients
+    from app.core.structured_log import event_logger
+    from app.engine.plan import plan_cache
+
+    for mode, pool in http_clients.stats().items():
+        if isinstance(pool, dict):
+            yield "automateos_http_pool_open_connections", "Open upstream HTTP connections.", {"client": mode}, pool["openConnections"]
+            yield "automateos_http_pool_requests", "Upstream HTTP requests sent through the pool.", {"client": mode}, pool["requests"]
+    yield "automateos_plan_cache_entries", "Compiled workflow plans cached.", {}, plan_cache.stats()["size"]
+    for key, value in event_logger.stats().items():
+        yield "automateos_log_records", "Structured log pipeline counters.", {"state": key}, value
+
+
+def queue_depth_collector(queue: Any) -> Collector:
+    """Gauge for one RQ queue; register it separately so Redis being down only drops this gauge."""
+    def collect() -> Iterable[Tuple[str, str, Dict[str, str], float]]:
+        yield "automateos_rq_queue_depth", "Jobs waiting in the RQ queue.", {"queue": queue.name}, queue.count
+    return collect
+
+
+metrics = MetricsRegistry(enabled=settings.METRICS_ENABLED)
+
+# --- Shared metrics (recorded by the API, the orchestrator and the worker) ---
+http_request_duration = metrics.histogram(
+    "automateos_http_request_duration_seconds", "API request latency by route template.", ("method", "route", "status"),
+)
+node_duration = metrics.histogram(
+    "automateos_node_duration_seconds", "Node execution time by node type.", ("node_type",),
+)
+node_errors = metrics.counter(
+    "automateos_node_errors_total", "Node executions that raised, by node type.", ("node_type",),
+)
+workflow_runs = metrics.counter(
+    "automateos_workflow_runs_total", "Workflow runs finished by the worker, by final status.", ("status",),
+)
@@ -1,6 +1,12 @@
+import math
 import os
+from typing import List, Sequence
+
 import redis
 from rq import Queue
+from rq.job import Job
+
+from app.core.config import settings
 
 # Configure Redis connection.
 # Prefer REDIS_URL environment variable; fall back to localhost for dev or docker service name
@@ -8,4 +14,24 @@ REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 redis_conn = redis.from_url(REDIS_URL)
 
 # Variable for handle queue.
-q = Queue(connection=redis_conn)
\ No newline at end of file
+q = Queue(connection=redis_conn)
+
+
+def batch_job_timeout(size: int, per_workflow: int = Queue.DEFAULT_TIMEOUT) -> int:
+    """RQ timeout for one job running ``size`` workflows, WORKFLOW_MAX_CONCURRENCY at a time."""
+    return per_workflow * math.ceil(max(1, size) / max(1, settings.WORKFLOW_MAX_CONCURRENCY))
+
+
+def enqueue_workflow_batches(workflow_ids: Sequence[int], queue: Queue | None = None, batch_size: int | None = None) -> List[Job]:
+    """Enqueue ``process_workflow_batch`` jobs of up to ``batch_size`` ids in one Redis pipeline."""
+    queue = queue or q
+    size = max(1, batch_size or settings.WORKFLOW_BATCH_SIZE)
+    chunks = [list(workflow_ids[i:i + size]) for i in range(0, len(workflow_ids), size)]
+    job_datas = [
+        Queue.prepare_data("app.engine.tasks.process_workflow_batch", args=(chunk,), timeout=batch_job_timeout(len(chunk)))
+        for chunk in chunks
+    ]
+    with queue.connection.pipeline() as pipe:
+        jobs = queue.enqueue_many(job_datas, pipeline=pipe)
+        pipe.execute()
+    return jobs
@@ -0,0 +1,226 @@
+# :Modules: Engine Run Store
+"""Bounded in-memory store for ``/v1/execute`` runs with live event fan-out.
+
+- Size bound: at most ``max_runs`` records; the least recently used *finished*
+  run is evicted first. Active (queued/running) runs are never dropped, so at
+  most ``max_active`` of them are admitted; ``create`` raises ``RunStoreFull``
+  beyond that.
+- Age bound: finished runs older than ``ttl_seconds`` are evicted.
+- Optional spill: evicted finished runs are written to a small SQLite file
+  (``spill_path``) together with their event list, and are still served by
+  :meth:`RunStore.get` / :meth:`RunStore.subscribe` (same event ids as live).
+- Every step/log/status change is appended to the run's event list and wakes
+  subscribers, which is what the SSE endpoint streams.
+
+The store is used from the FastAPI event loop only.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+FINISHED_STATUSES = {"succeeded", "failed"}
+
+
+def utc_ts() -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+class RunStoreFull(Exception):
+    """Raised by :meth:`RunStore.create` when ``max_active`` runs are already queued or running."""
+
+
+class RunEntry:
+    """A live run: its public record plus the ordered event log used for streaming."""
+
+    def __init__(self, record: Dict[str, Any]) -> None:
+        self.record = record
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.changed = asyncio.Event()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.record.get("status") in FINISHED_STATUSES
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        self.events.append((event, data))
+        # Wake everyone currently waiting, then re-arm for the next change.
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class RunStore:
+    """LRU/TTL-bounded run records with optional SQLite spill for finished runs."""
+
+    def __init__(self, max_runs: int, ttl_seconds: float, spill_path: str = "", max_active: Optional[int] = None) -> None:
+        self.max_runs = max(1, max_runs)
+        # Active runs cannot be evicted, so they alone must fit in the size bound.
+        self.max_active = min(self.max_runs, max(1, max_active)) if max_active else self.max_runs
+        self.ttl_seconds = ttl_seconds
+        self._active = 0
+        self._entries: "OrderedDict[str, RunEntry]" = OrderedDict()
+        self._spill: Optional[sqlite3.Connection] = None
+        if spill_path:
+            self._spill = sqlite3.connect(spill_path, check_same_thread=False)
+            self._spill.execute(
+                "CREATE TABLE IF NOT EXISTS engine_runs"
+                " (id TEXT PRIMARY KEY, record TEXT NOT NULL, finished_at REAL, events TEXT NOT NULL)"
+            )
+            self._spill.commit()
+
+    # --- Writes ---
+    def create(self, record: Dict[str, Any]) -> RunEntry:
+        """Admit a new run; raises ``RunStoreFull`` when ``max_active`` runs are still active."""
+        self.evict()
+        if self._active >= self.max_active:
+            raise RunStoreFull(f"{self._active} runs are already queued or running")
+        entry = RunEntry(record)
+        self._entries[record["id"]] = entry
+        if not entry.finished:
+            self._active += 1
+        self._enforce_size()
+        return entry
+
+    def set_status(self, run_id: str, status: str) -> None:
+        entry = self._entries.get(run_id)
+        if entry is None:
+            return
+        was_finished = entry.finished
+        entry.record["status"] = status
+        if status in FINISHED_STATUSES:
+            entry.finished_at = time.monotonic()
+            if not was_finished:
+                self._active -= 1
+        entry.publish("status", {"status": status})
+
+    def append_log(self, run_id: str, level: str, msg: str) -> None:
+        entry = self._entries.get(run_id)
+        if entry is None:
+            return
+        log = {"ts": utc_ts(), "level": level, "msg": msg}
+        entry.record["logs"].append(log)
+        entry.publish("log", log)
+
+    def append_step(self, run_id: str, step: Dict[str, Any]) -> None:
+        entry = self._entries.get(run_id)
+        if entry is None:
+            return
+        entry.record["steps"].append(step)
+        entry.publish("step", step)
+
+    # --- Reads ---
+    def get_entry(self, run_id: str) -> Optional[RunEntry]:
+        entry = self._entries.get(run_id)
+        if entry is not None:
+            self._entries.move_to_end(run_id)
+        return entry
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.get_entry(run_id)
+        if entry is not None:
+            return entry.record
+        return self._load_spilled(run_id)
+
+    async def subscribe(self, run_id: str, after: int = -1, heartbeat: float = 15.0) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+        """Yield ``(seq, event, data)`` for events after ``after``, live, until the run finishes.
+
+        Yields ``(-1, "", {})`` as a heartbeat while idle. Spilled runs are replayed from
+        their record. Stops immediately for unknown run ids.
+        """
+        entry = self._entries.get(run_id)
+        if entry is None:
+            spilled = self._load_spilled_events(run_id)
+            if spilled is None:
+                return
+            # Same list, same order as when the run was live, so Last-Event-ID still lines up.
+            for seq, (event, data) in enumerate(spilled):
+                if seq > after:
+                    yield seq, event, data
+            return
+
+        seq = after + 1
+        while True:
+            while seq < len(entry.events):
+                event, data = entry.events[seq]
+                yield seq, event, data
+                seq += 1
+            if entry.finished:
+                return
+            changed = entry.changed
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield -1, "", {}
+
+    # --- Bounds ---
+    def evict(self) -> None:
+        """Drop finished runs older than the TTL."""
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [
+            run_id for run_id, entry in self._entries.items()
+            if entry.finished_at is not None and entry.finished_at < cutoff
+        ]
+        for run_id in expired:
+            self._drop(run_id)
+
+    def _enforce_size(self) -> None:
+        if len(self._entries) <= self.max_runs:
+            return
+        # Oldest-first; active runs are skipped (create() keeps them within max_active <= max_runs).
+        for run_id in [rid for rid, entry in self._entries.items() if entry.finished]:
+            if len(self._entries) <= self.max_runs:
+                break
+            self._drop(run_id)
+
+    def _drop(self, run_id: str) -> None:
+        entry = self._entries.pop(run_id)
+        if self._spill is not None:
+            self._spill.execute(
+                "INSERT OR REPLACE INTO engine_runs (id, record, finished_at, events) VALUES (?, ?, ?, ?)",
+                (
+                    run_id,
+                    json.dumps(entry.record, ensure_ascii=False, default=str),
+                    time.time(),
+                    json.dumps(entry.events, ensure_ascii=False, default=str),
+                ),
+            )
+            self._spill.commit()
+
+    def _load_spilled(self, run_id: str) -> Optional[Dict[str, Any]]:
+        if self._spill is None:
+            return None
+        row = self._spill.execute("SELECT record FROM engine_runs WHERE id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _load_spilled_events(self, run_id: str) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        if self._spill is None:
+            return None
+        row = self._spill.execute("SELECT events FROM engine_runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        return [(event, data) for event, data in json.loads(row[0])]
+
+    def stats(self) -> Dict[str, int]:
+        return {"inMemory": len(self._entries), "active": self._active, "maxActive": self.max_active, "maxRuns": self.max_runs}
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+
+run_store = RunStore(
+    max_runs=settings.RUN_STORE_MAX_RUNS,
+    ttl_seconds=settings.RUN_STORE_TTL_SECONDS,
+    spill_path=settings.RUN_STORE_SPILL_PATH,
+    max_active=settings.ENGINE_MAX_PENDING_RUNS,
+)
@@ -1,5 +1,7 @@
 # :Modules: Security Utilities
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, TypedDict
 
 from datetime import datetime, timedelta, timezone
@@ -27,6 +29,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# Bcrypt is CPU-bound (~100ms+); async endpoints run it on a dedicated pool
+# so a burst of logins cannot stall the event loop.
+bcrypt_pool = ThreadPoolExecutor(max_workers=settings.BCRYPT_THREADS, thread_name_prefix="bcrypt") if settings.BCRYPT_THREADS > 0 else None
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    if bcrypt_pool is None:
+        return verify_password(plain_password, hashed_password)
+    return await asyncio.get_running_loop().run_in_executor(bcrypt_pool, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    if bcrypt_pool is None:
+        return get_password_hash(password)
+    return await asyncio.get_running_loop().run_in_executor(bcrypt_pool, get_password_hash, password)
+
 # --- Key Generation ---
 # JWT token Creation.
 def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
@@ -0,0 +1,214 @@
+# :Modules: Structured Event Log
+"""Non-blocking JSON-lines event log for the API, the nodes and the worker.
+
+``log_event`` only filters, samples and enqueues; a background thread does the
+``json.dumps`` and writes records to stdout in batches (one write + flush per
+batch). The hot path therefore never blocks on the terminal or a log pipe.
+
+- Level filter: ``LOG_LEVEL`` (debug < info < warning < error).
+- Sampling: ``LOG_SAMPLE_RATE`` applies to debug/info events only; warnings and
+  errors are always kept.
+- Back-pressure: when the bounded queue is full, records are dropped and
+  counted (``stats()["dropped"]``) instead of blocking the caller.
+
+Call ``flush()`` to wait for queued records (tests, shutdown) and ``close()``
+on exit. A forked child starts with a fresh queue and writer thread; worker
+tasks flush before returning because a work horse exits with ``os._exit``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, TextIO
+
+from app.core.config import settings
+
+LEVELS: Dict[str, int] = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+SENSITIVE_HEADER_KEYS = {"authorization", "x-api-key", "api-key", "x-auth-token", "cookie"}
+
+
+def mask_value(v: str) -> str:
+    if not v:
+        return v
+    if len(v) <= 6:
+        return "*" * len(v)
+    return v[:3] + "***" + v[-2:]
+
+
+def mask_headers(headers: Mapping[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for k, v in headers.items():
+        if k.lower() in SENSITIVE_HEADER_KEYS:
+            out[k] = mask_value(str(v))
+        else:
+            out[k] = v
+    return out
+
+
+class MaskedHeaders:
+    """Defers copying and masking request headers to the writer thread."""
+
+    __slots__ = ("headers",)
+
+    def __init__(self, headers: Mapping[str, Any]) -> None:
+        self.headers = headers
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, MaskedHeaders):
+        return mask_headers(value.headers)
+    return str(value)
+
+
+def _timestamp(epoch: float) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(epoch))
+
+
+_STOP = object()
+
+
+class EventLogger:
+    """Bounded queue + batching writer thread for structured log records."""
+
+    def __init__(
+        self,
+        *,
+        level: str = "info",
+        sample_rate: float = 1.0,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        queue_size: int = 10000,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        self.min_level = LEVELS.get(level.lower(), LEVELS["info"])
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.01, flush_interval)
+        self.queue_size = max(1, queue_size)
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self.emitted = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def enabled_for(self, level: str) -> bool:
+        return LEVELS.get(level, LEVELS["info"]) >= self.min_level
+
+    def log(self, event: str, level: str = "info", **fields: Any) -> None:
+        severity = LEVELS.get(level, LEVELS["info"])
+        if severity < self.min_level:
+            return
+        if severity < LEVELS["warning"] and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait((time.time(), event, level, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    # --- Writer thread ---
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._drain, name="event-log-writer", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch: List[Any] = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            self._write([item for item in batch if item is not _STOP])
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[Any]) -> None:
+        if not batch:
+            return
+        lines = []
+        for ts, event, level, fields in batch:
+            rec: Dict[str, Any] = {"ts": _timestamp(ts), "event": event, **fields}
+            if level != "info":
+                rec["level"] = level
+            try:
+                lines.append(json.dumps(rec, ensure_ascii=False, default=_json_default))
+            except (TypeError, ValueError) as e:
+                lines.append(json.dumps({"ts": rec["ts"], "event": event, "level": "error", "logError": str(e)}))
+        stream = self.stream or sys.stdout
+        try:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+        except (OSError, ValueError):
+            # stdout closed (e.g. interpreter shutdown): nothing left to log to.
+            pass
+        self.emitted += len(lines)
+
+    # --- Lifecycle ---
+    def flush(self) -> None:
+        """Block until every record queued so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout=5)
+        self._thread = None
+
+    def after_fork(self) -> None:
+        # The writer thread does not survive fork(); the child gets its own.
+        self._lock = threading.Lock()
+        self._reset()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "sampledOut": self.sampled_out,
+        }
+
+
+event_logger = EventLogger(
+    level=settings.LOG_LEVEL,
+    sample_rate=settings.LOG_SAMPLE_RATE,
+    batch_size=settings.LOG_BATCH_SIZE,
+    flush_interval=settings.LOG_FLUSH_INTERVAL_SECONDS,
+    queue_size=settings.LOG_QUEUE_SIZE,
+)
+
+
+def log_event(event: str, level: str = "info", **fields: Any) -> None:
+    """Queue one structured record: ``{"ts", "event", [level], **fields}``."""
+    event_logger.log(event, level, **fields)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=event_logger.after_fork)
@@ -3,7 +3,7 @@
 import os
 
 from sqlmodel import create_engine, Session, SQLModel
-from sqlalchemy import inspect as sa_inspect, text
+from sqlalchemy import func, inspect as sa_inspect, text
 from typing import Any
 
 """
@@ -50,4 +50,31 @@ def create_db_and_tables():
                     conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN status TEXT DEFAULT 'pending'"))
     except Exception as e:
         # Non-fatal: log and continue
-        print(f"[DB MIGRATION] Skipped or failed to ensure created_at: {e}")
\ No newline at end of file
+        print(f"[DB MIGRATION] Skipped or failed to ensure created_at: {e}")
+    ensure_indexes_and_summaries()
+
+# Indexes added after the first release are not created by create_all() on
+# existing tables; create any that are missing, then backfill run summaries.
+def ensure_indexes_and_summaries():
+    try:
+        from sqlmodel import select
+        from app.models.workflow import WorkflowRun, WorkflowRunSummary  # local import to avoid cycles
+        from app.engine.run_summary import rebuild_run_summaries
+
+        table_obj: Any = getattr(WorkflowRun, "__table__")
+        for index in table_obj.indexes:
+            index.create(engine, checkfirst=True)
+
+        with Session(engine) as session:
+            # Summary rows are written in the same transaction as their runs, so the
+            # totals only disagree when runs predate the table (or a worker without
+            # it wrote some): a worker-created row must not hide the missing ones.
+            # One COUNT over the runs table, at startup only.
+            run_total = session.exec(select(func.count(WorkflowRun.id)).where(WorkflowRun.workflow_id.is_not(None))).one()  # type: ignore[union-attr]
+            summary_total = session.exec(select(func.coalesce(func.sum(WorkflowRunSummary.total_count), 0))).one()
+            if run_total != summary_total:
+                rows = rebuild_run_summaries(session)
+                print(f"[DB MIGRATION] Backfilled run summaries for {rows} workflows")
+    except Exception as e:
+        # Non-fatal: log and continue
+        print(f"[DB MIGRATION] Skipped or failed to ensure indexes/summaries: {e}")
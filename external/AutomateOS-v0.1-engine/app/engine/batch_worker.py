@@ -0,0 +1,135 @@
+# :Modules: Draining RQ Worker
+"""SimpleWorker that runs single-workflow jobs in batches.
+
+When it dequeues an ``app.engine.tasks.process_workflow`` job it also claims up
+to ``WORKFLOW_BATCH_SIZE - 1`` more ``process_workflow`` jobs waiting in the
+same queue and runs them together through ``process_workflow_batch`` (one
+definition query, one insert and one final-status transaction, workflows run
+concurrently). Every claimed job is still marked finished/failed in RQ on its
+own, so job status, results and the registries look the same as without
+batching. Other job types go through the normal SimpleWorker path.
+
+A job is claimed by moving its id from the queue into RQ's intermediate queue
+in one MULTI/EXEC transaction (``LREM`` + ``RPUSH``), exactly where RQ's own
+dequeue puts it: if the worker dies before the job reaches the
+StartedJobRegistry, RQ's intermediate-queue cleanup fails it instead of it
+being lost. Only the worker whose ``LREM`` removed the id keeps the claim, so
+two workers never run the same job. Jobs with dependents, retries or
+success/failure/stopped callbacks are left to the normal path.
+"""
+from __future__ import annotations
+
+import sys
+import traceback
+from typing import List
+
+from rq import Queue, SimpleWorker
+from rq.executions import Execution
+from rq.job import Job, JobStatus
+from rq.timeouts import JobTimeoutException
+from rq.utils import now
+from rq.worker import WorkerStatus
+
+from app.core.config import settings
+from app.core.queue import batch_job_timeout
+from app.core.structured_log import log_event
+
+PROCESS_WORKFLOW = "app.engine.tasks.process_workflow"
+
+
+def _batchable(job: Job) -> bool:
+    return (
+        job.func_name == PROCESS_WORKFLOW
+        and len(job.args) == 1
+        and not job.kwargs
+        and not job.should_retry
+        and not job.dependent_ids
+        and job.success_callback is None
+        and job.failure_callback is None
+        and job.stopped_callback is None
+    )
+
+
+class BatchingWorker(SimpleWorker):
+    """Drains up to ``batch_size`` queued ``process_workflow`` jobs per execution."""
+
+    def __init__(self, *args, batch_size: int | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.batch_size = max(1, batch_size or settings.WORKFLOW_BATCH_SIZE)
+
+    def execute_job(self, job: Job, queue: Queue):
+        extras = self.claim_batch(queue, self.batch_size - 1) if _batchable(job) else []
+        if not extras:
+            return super().execute_job(job, queue)
+        self.prepare_execution(job)
+        self.perform_batch([job, *extras], queue)
+        self.set_state(WorkerStatus.IDLE)
+
+    def claim_batch(self, queue: Queue, limit: int) -> List[Job]:
+        """Take up to ``limit`` batchable jobs off the front of ``queue``."""
+        if limit <= 0:
+            return []
+        # Look a little past ``limit`` so a few other job types in between don't end the batch.
+        job_ids = queue.get_job_ids(0, limit * 2 - 1)
+        claimed: List[Job] = []
+        for candidate in Job.fetch_many(job_ids, connection=self.connection, serializer=self.serializer):
+            if len(claimed) >= limit:
+                break
+            if candidate is None or not _batchable(candidate):
+                continue
+            if self._claim(queue, candidate.id):
+                claimed.append(candidate)
+        return claimed
+
+    def _claim(self, queue: Queue, job_id: str) -> bool:
+        """Atomically move ``job_id`` from ``queue`` into its intermediate queue."""
+        with self.connection.pipeline(transaction=True) as pipeline:
+            pipeline.lrem(queue.key, 1, job_id)
+            pipeline.rpush(queue.intermediate_queue_key, job_id)
+            removed, _ = pipeline.execute()
+        if removed:
+            return True
+        # Another worker took it first: undo our push (one id stays for the winner).
+        self.connection.lrem(queue.intermediate_queue_key, 1, job_id)
+        return False
+
+    def perform_batch(self, jobs: List[Job], queue: Queue) -> None:
+        """``perform_job`` for several jobs that share one ``process_workflow_batch`` call."""
+        from app.engine.tasks import process_workflow_batch
+
+        lead = jobs[0]
+        started_job_registry = queue.started_job_registry
+        executions = {lead.id: self.execution}
+        with self.connection.pipeline() as pipeline:
+            for job in jobs[1:]:
+                executions[job.id] = Execution.create(job, self.get_heartbeat_ttl(job), pipeline=pipeline)
+                job.prepare_for_execution(self.name, pipeline=pipeline)
+                # Registered as started in the same transaction: the claim is no longer needed.
+                pipeline.lrem(queue.intermediate_queue_key, 1, job.id)
+            pipeline.execute()
+        self.prepare_job_execution(lead, remove_from_intermediate_queue=len(self.queues) == 1)
+        log_event("worker.batch.drained", count=len(jobs), queue=queue.name)
+
+        started_at = now()
+        per_job = max(job.timeout or self.queue_class.DEFAULT_TIMEOUT for job in jobs)
+        try:
+            with self.death_penalty_class(batch_job_timeout(len(jobs), per_job), JobTimeoutException, job_id=lead.id):
+                process_workflow_batch([job.args[0] for job in jobs])
+        except:  # NOQA
+            exc_info = sys.exc_info()
+            exc_string = "".join(traceback.format_exception(*exc_info))
+            self.handle_exception(lead, *exc_info)
+            for job in jobs:
+                job._status = JobStatus.FAILED
+                job.started_at = started_at
+                self.handle_execution_ended(job, queue, job.failure_callback_timeout)
+                self.execution = executions[job.id]
+                self.handle_job_failure(job=job, exc_string=exc_string, queue=queue, started_job_registry=started_job_registry)
+            return
+
+        for job in jobs:
+            job.started_at = started_at
+            self.handle_execution_ended(job, queue, job.success_callback_timeout)
+            job._result = None
+            self.execution = executions[job.id]
+            self.handle_job_success(job=job, queue=queue, started_job_registry=started_job_registry)
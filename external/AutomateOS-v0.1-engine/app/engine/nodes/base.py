@@ -11,9 +11,17 @@ class BaseNode:
         # configuration for the node (from the workflow definition)
         self.config = config
 
+    @classmethod
+    def validate_config(cls, config: Dict[str, Any]) -> None:
+        """
+        Check the node's config once, when the workflow is compiled.
+        Subclasses raise ValueError for bad configs; the default accepts anything.
+        """
+        return None
+
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute the node's logic.
         Must be implemented by subclasses.
         """
-        raise NotImplementedError("Each node must implement an execute method.")
\ No newline at end of file
+        raise NotImplementedError("Each node must implement an execute method.")
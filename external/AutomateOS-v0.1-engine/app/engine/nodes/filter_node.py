@@ -9,11 +9,29 @@ Example config:
     {"condition": "input_data['http_request_node']['status_code'] == 200"}
 """
 from __future__ import annotations
+import ast
+from functools import lru_cache
+from types import CodeType
 from typing import Any, Dict
 
+from app.core.structured_log import log_event
 from app.engine.nodes.base import BaseNode
 
 
+@lru_cache(maxsize=1024)
+def compile_condition(condition: str) -> CodeType:
+    """Parse, check and compile a condition once; later calls hit the cache.
+
+    Raises SyntaxError for unparsable expressions and ValueError when the
+    expression reaches for dunder attributes (e.g. ``().__class__``).
+    """
+    tree = ast.parse(condition, mode="eval")
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr.startswith("__"):
+            raise ValueError(f"access to '{node.attr}' is not allowed")
+    return compile(tree, "<filter_condition>", "eval")
+
+
 class FilterNode(BaseNode):
     """Evaluate a boolean expression against the orchestrator state.
 
@@ -26,14 +44,27 @@ class FilterNode(BaseNode):
       when the condition evaluates to False (to stop the workflow).
     """
 
-    def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    @classmethod
+    def validate_config(cls, config: Dict[str, Any]) -> None:
+        cls._compiled_condition(config)
+
+    @staticmethod
+    def _compiled_condition(config: Dict[str, Any]) -> CodeType:
         # Fetch and validate the condition string from this node's config.
-        condition = self.config.get("condition")
+        condition = config.get("condition")
         if not isinstance(condition, str) or not condition:
             # Misconfiguration: enforce clear error early.
             raise ValueError("FilterNode requires a non-empty 'condition' string in its config.")
+        try:
+            return compile_condition(condition)
+        except (SyntaxError, ValueError) as e:
+            raise ValueError(f"FilterNode: invalid condition '{condition}': {e}") from e
+
+    def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        code = self._compiled_condition(self.config)
+        condition = self.config["condition"]
 
-        print(f"FilterNode: Evaluating condition: {condition}")
+        log_event("node.filter.evaluate", level="debug", condition=condition)
 
         # Security: evaluate the expression in a restricted namespace.
         #  - No builtins exposed (prevents access to dangerous functions).
@@ -44,7 +75,7 @@ class FilterNode(BaseNode):
         safe_locals: Dict[str, Any] = {"input_data": input_data}
 
         try:
-            result = eval(condition, safe_globals, safe_locals)  # noqa: S307 (intentional, sandboxed)
+            result = eval(code, safe_globals, safe_locals)  # noqa: S307 (intentional, sandboxed)
         except Exception as e:
             # Expression could not be evaluated (syntax/key errors, etc.).
             raise ValueError(f"FilterNode: invalid condition '{condition}': {e}") from e
@@ -54,10 +85,10 @@ class FilterNode(BaseNode):
             raise ValueError("FilterNode condition must evaluate to a boolean (True/False).")
 
         if result:
-            print("FilterNode: Condition is TRUE. Continuing workflow.")
+            log_event("node.filter.passed", level="debug", condition=condition)
             # Return a minimal, predictable payload; the full state is carried by the orchestrator.
             return {"passed": True}
 
         # Signal a controlled stop when the condition fails.
-        print("FilterNode: Condition is FALSE. Stopping workflow.")
+        log_event("node.filter.stopped", condition=condition)
         raise RuntimeError("FilterNode condition evaluated to False")
\ No newline at end of file
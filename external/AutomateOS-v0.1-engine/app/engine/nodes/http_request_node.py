@@ -1,5 +1,5 @@
 from __future__ import annotations
-"""HTTP request node with structured JSON logging and naive masking of basic-auth in URL.
+"""HTTP request node with structured event logging and naive masking of basic-auth in URL.
 
 Pyright relaxed via directives for this prototype.
 """
@@ -9,8 +9,29 @@ import json, time
 
 import httpx  # type: ignore  # [[modern and easy-to-use HTTP client library.]]
 
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.core.http_client import http_clients
+from app.core.structured_log import log_event
 from app.engine.nodes.base import BaseNode
 
+# Response headers copied into the node output (run state and WorkflowRun.logs).
+# Everything else (cookies, tracing, CDN noise) is dropped unless the step asks for it.
+DEFAULT_RESPONSE_HEADERS = (
+    "content-type",
+    "content-length",
+    "content-encoding",
+    "content-disposition",
+    "etag",
+    "last-modified",
+    "location",
+    "retry-after",
+    "x-request-id",
+    "x-ratelimit-limit",
+    "x-ratelimit-remaining",
+    "x-ratelimit-reset",
+)
+
 
 class HttpRequestNode(BaseNode):
     """HTTP request node.
@@ -18,9 +39,34 @@ class HttpRequestNode(BaseNode):
     Notes:
     - Does NOT raise for non-2xx responses; returns status_code, headers, json, text.
       This lets a downstream FilterNode decide pass/fail.
-    - Accepts config keys: url (required), method (default GET), headers/header, params, json_body.
+    - Accepts config keys: url (required), method (default GET), headers/header, params, json_body, timeout,
+      max_output_bytes (defaults to NODE_OUTPUT_MAX_BYTES; 0 = unlimited),
+      response_headers (extra response header names to keep, or "*" for all).
+    - Output ``headers`` only holds DEFAULT_RESPONSE_HEADERS plus ``response_headers``.
+    - Uses the process-wide pooled client (app.core.http_client), so connections are kept alive.
+    - The body is streamed. Bodies over the output budget are written to the blob store
+      (app.core.blob_store) and returned as ``body`` (a blob reference) with ``truncated: True``,
+      ``json: None`` and ``text`` holding only a preview.
     """
 
+    @classmethod
+    def validate_config(cls, config: Dict[str, Any]) -> None:
+        if not config.get("url"):
+            raise ValueError("URL is required for HttpRequestNode")
+        if not isinstance(config.get("method", "GET"), str):
+            raise ValueError("HttpRequestNode 'method' must be a string")
+        max_output_bytes = config.get("max_output_bytes")
+        if max_output_bytes is not None and (not isinstance(max_output_bytes, int) or max_output_bytes < 0):
+            raise ValueError("HttpRequestNode 'max_output_bytes' must be a non-negative integer")
+        for key in ("headers", "header", "params"):
+            if config.get(key) is not None and not isinstance(config[key], dict):
+                raise ValueError(f"HttpRequestNode '{key}' must be an object")
+        response_headers = config.get("response_headers")
+        if response_headers is not None and response_headers != "*" and (
+            not isinstance(response_headers, list) or not all(isinstance(name, str) for name in response_headers)
+        ):
+            raise ValueError("HttpRequestNode 'response_headers' must be a list of header names or \"*\"")
+
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         # Read the configuration for this node from the self.config dictionary.
         url = self.config.get("url")
@@ -28,9 +74,14 @@ class HttpRequestNode(BaseNode):
         headers = self.config.get("headers") or self.config.get("header", {})
         params = self.config.get("params", {})
         json_body = self.config.get("json_body", {})
+        # Optional per-node timeout (seconds); otherwise the pool default applies.
+        timeout = self.config.get("timeout")
+        request_options: Dict[str, Any] = {"timeout": float(timeout)} if timeout else {}
+        max_output_bytes = self.config.get("max_output_bytes", settings.NODE_OUTPUT_MAX_BYTES)
+        response_headers = self.config.get("response_headers")
 
         if not url:
-            print("HTTP Request Error: Error - URL is not defined in the config.")
+            log_event("node.http.error", level="error", error="URL is not defined in the config")
             raise ValueError("URL is required for HttpRequestNode")
 
         start = time.time()
@@ -43,53 +94,85 @@ class HttpRequestNode(BaseNode):
                 safe_url = f"{scheme}://***:***@{hostpart}"
             except Exception:
                 safe_url = url
-        print(json.dumps({
-            "event": "node.http.execute",
-            "url": safe_url,
-            "method": method,
-        }))
+        log_event("node.http.execute", level="debug", url=safe_url, method=method)
 
         try:
-            with httpx.Client(timeout=30.0) as client:
-                response = client.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=json_body,
-                )
-
-                # Prepare the output data for the next node.
-                try:
-                    response_json: Any = response.json()
-                except ValueError:
-                    response_json = None
-
-                output: Dict[str, Any] = {
-                    "status_code": int(response.status_code),
-                    "headers": dict(response.headers),
-                    "json": response_json,
-                    "text": response.text,
-                }
-
-                print(json.dumps({
-                    "event": "node.http.complete",
-                    "url": safe_url,
-                    "method": method,
-                    "status": int(response.status_code),
-                    "durationMs": int((time.time() - start) * 1000),
-                }))
-                return output
+            # Shared keep-alive pool: connections are reused across steps and runs.
+            with http_clients.stream(
+                method=method,
+                url=url,
+                headers=headers,
+                params=params,
+                json=json_body,
+                **request_options,
+            ) as response:
+                output = self._read_body(response, max_output_bytes, response_headers)
+
+            log_event(
+                "node.http.complete",
+                url=safe_url,
+                method=method,
+                status=output["status_code"],
+                bytes=output["body"]["size"] if output.get("truncated") else len(output["text"].encode("utf-8")),
+                truncated=bool(output.get("truncated")),
+                durationMs=int((time.time() - start) * 1000),
+            )
+            return output
 
         except httpx.RequestError as e:
             # network / timeout / connection error
-            print(json.dumps({
-                "event": "node.http.error",
-                "url": safe_url,
-                "method": method,
-                "error": str(e),
-                "durationMs": int((time.time() - start) * 1000),
-            }))
+            log_event(
+                "node.http.error",
+                level="error",
+                url=safe_url,
+                method=method,
+                error=str(e),
+                durationMs=int((time.time() - start) * 1000),
+            )
             raise
 
+    @staticmethod
+    def _kept_headers(headers: httpx.Headers, extra: Any = None) -> Dict[str, str]:
+        if extra == "*":
+            return dict(headers)
+        wanted = set(DEFAULT_RESPONSE_HEADERS).union(name.lower() for name in extra or ())
+        return {name: value for name, value in headers.items() if name.lower() in wanted}
+
+    @classmethod
+    def _read_body(cls, response: httpx.Response, max_output_bytes: int, response_headers: Any = None) -> Dict[str, Any]:
+        """Buffer the body up to the budget; past it, stream the rest straight to the blob store."""
+        output: Dict[str, Any] = {
+            "status_code": int(response.status_code),
+            "headers": cls._kept_headers(response.headers, response_headers),
+        }
+        buffered = bytearray()
+        writer = None
+        try:
+            for chunk in response.iter_bytes():
+                if writer is not None:
+                    writer.write(chunk)
+                    continue
+                buffered.extend(chunk)
+                if max_output_bytes and len(buffered) > max_output_bytes:
+                    writer = blob_store.writer()
+                    writer.write(bytes(buffered))
+                    buffered.clear()
+        except Exception:
+            if writer is not None:
+                writer.abort()
+            raise
+
+        if writer is not None:
+            ref = writer.commit(response.headers.get("content-type", "application/octet-stream"))
+            output.update({"json": None, "text": ref["preview"], "body": ref, "truncated": True})
+            return output
 
+        # Prepare the output data for the next node.
+        body = bytes(buffered)
+        text = body.decode(response.encoding or "utf-8", errors="replace")
+        try:
+            response_json: Any = json.loads(body) if body else None
+        except ValueError:
+            response_json = None
+        output.update({"json": response_json, "text": text})
+        return output
@@ -1,63 +1,136 @@
-"""The Orchestrator that dynamically loads and runs the nodes."""
+"""The Orchestrator that dynamically loads and runs the nodes.
+
+Steps run one after another unless a step declares ``depends_on``. Once any
+step does, the definition is treated as a DAG: every step waits only for the
+steps it lists, and independent steps run concurrently on a thread pool.
+
+Definitions are compiled once into an ``ExecutionPlan`` (see ``app.engine.plan``)
+and cached per process, so node lookup and config validation are not repeated
+on every run.
+
+Each node output is held to ``NODE_OUTPUT_MAX_BYTES`` of JSON: oversized values
+are moved to the blob store (``app.core.blob_store``) and replaced by a
+reference, so run state and ``WorkflowRun.logs`` stay small.
+
+Example DAG definition:
+    {"steps": [
+        {"id": "a", "type": "http_request_node", "config": {...}},
+        {"id": "b", "type": "http_request_node", "config": {...}},
+        {"id": "check", "type": "filter_node", "depends_on": ["a", "b"],
+         "config": {"condition": "input_data['a']['status_code'] == 200"}}
+    ]}
+"""
 from __future__ import annotations
 
-from importlib import import_module
-from typing import Any, Dict, List, TypedDict
-
-from app.engine.nodes.base import BaseNode
-
-
-class Step(TypedDict, total=False):
-    type: str
-    config: Dict[str, Any]
-
-
-def _class_name_from_node_type(node_type: str) -> str:
-    # http_request_node -> HttpRequestNode
-    return "".join(part.capitalize() for part in node_type.split("_"))
-
-
-def run_workflow(workflow_definition: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Dynamically load and execute nodes as defined in the workflow.
-    Returns a state dict keyed by node type.
-    """
+import copy
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+from app.core.blob_store import cap_output
+from app.core.config import settings
+from app.core.metrics import metrics, node_duration, node_errors
+from app.engine.plan import CompiledStep, ExecutionPlan, plan_cache
+
+
+def _execute_step(step: CompiledStep, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Instantiate and execute a single node, wrapping failures with step context."""
+    # Each node gets its own copy: the plan is cached and shared by every run.
+    node = step.node_class(config=copy.deepcopy(step.config))
+    started = time.perf_counter()
+    try:
+        output = node.execute(input_data=input_data)
+    except Exception as e:
+        if metrics.enabled:
+            node_errors.inc(node_type=step.type)
+        raise RuntimeError(f"Step {step.index} ({step.type}) failed: {e}") from e
+    finally:
+        if metrics.enabled:
+            node_duration.observe(time.perf_counter() - started, node_type=step.type)
+    if not isinstance(output, dict):
+        return output
+    # A step's own max_output_bytes (0 = unlimited) overrides the global budget in both directions.
+    return cap_output(output, step.config.get("max_output_bytes", settings.NODE_OUTPUT_MAX_BYTES))
+
+
+def _record_output(state: Dict[str, Any], step: CompiledStep, output: Dict[str, Any]) -> None:
+    # Keyed by node type (legacy contract) and, when given, by the step's own id.
+    state[step.type] = output
+    if step.id:
+        state[step.id] = output
+
+
+def _run_linear(plan: ExecutionPlan) -> Dict[str, Any]:
     state: Dict[str, Any] = {}
-    steps: List[Step] = workflow_definition.get("steps", []) or []
-
-    for idx, step in enumerate(steps, start=1):
-        node_type = step.get("type")
-        if not isinstance(node_type, str) or not node_type:
-            raise ValueError(f"Step {idx}: 'type' is required")
+    for step in plan.steps:
+        output = _execute_step(step, state)
+        _record_output(state, step, output)
+    return state
 
-        module_path = f"app.engine.nodes.{node_type}"
-        class_name = _class_name_from_node_type(node_type)
 
-        # Import module
-        try:
-            module = import_module(module_path)
-        except Exception as e:
-            raise ImportError(f"Step {idx}: cannot import module '{module_path}': {e}") from e
+def _run_dag(plan: ExecutionPlan, max_concurrency: int) -> Dict[str, Any]:
+    steps = plan.steps
+    waiting_on = [len(step.depends_on) for step in steps]
+    outputs: Dict[int, Dict[str, Any]] = {}
+    ready = [i for i, n in enumerate(waiting_on) if n == 0]
+
+    def input_for(i: int) -> Dict[str, Any]:
+        # Each node sees only its (finished) upstream outputs, in definition order.
+        view: Dict[str, Any] = {}
+        for parent in steps[i].ancestors:
+            _record_output(view, steps[parent], outputs[parent])
+        return view
+
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="workflow-step") as pool:
+        running: Dict[Future[Dict[str, Any]], int] = {}
+        while ready or running:
+            ready.sort()
+            while ready and len(running) < max_concurrency:
+                i = ready.pop(0)
+                future = pool.submit(_execute_step, steps[i], input_for(i))
+                running[future] = i
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: running[f]):
+                i = running.pop(future)
+                try:
+                    outputs[i] = future.result()
+                except Exception:
+                    # Stop scheduling; steps already in flight are allowed to finish.
+                    for other in running:
+                        other.cancel()
+                    raise
+                for child in steps[i].children:
+                    waiting_on[child] -= 1
+                    if waiting_on[child] == 0:
+                        ready.append(child)
 
-        # Resolve class
-        try:
-            NodeClass = getattr(module, class_name)
-        except AttributeError as e:
-            raise ImportError(f"Step {idx}: class '{class_name}' not found in '{module_path}'") from e
+    state: Dict[str, Any] = {}
+    for i, step in enumerate(steps):
+        _record_output(state, step, outputs[i])
+    return state
 
-        # Validate base class
-        if not issubclass(NodeClass, BaseNode):
-            raise TypeError(f"Step {idx}: '{class_name}' must subclass BaseNode")
 
-        # Instantiate and execute
-        node = NodeClass(config=step.get("config", {}))
-        try:
-            output: Dict[str, Any] = node.execute(input_data=state)
-        except Exception as e:
-            raise RuntimeError(f"Step {idx} ({node_type}) failed: {e}") from e
+def execute_plan(plan: ExecutionPlan, max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Run an already compiled plan and return the final state."""
+    if not plan.is_dag:
+        return _run_linear(plan)
 
-        state[node_type] = output
+    limit = max_concurrency or plan.max_concurrency or settings.WORKFLOW_MAX_CONCURRENCY
+    return _run_dag(plan, max(1, int(limit)))
 
-    return state
 
+def run_workflow(
+    workflow_definition: Dict[str, Any],
+    max_concurrency: Optional[int] = None,
+    workflow_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Compile (or fetch the cached plan for) a workflow definition and execute it.
+    Returns a state dict keyed by node type (and by step id, when steps have one).
 
+    ``max_concurrency`` caps how many independent steps run at once; it falls back
+    to the definition's ``max_concurrency`` and then to ``settings.WORKFLOW_MAX_CONCURRENCY``.
+    """
+    plan = plan_cache.get_or_compile(workflow_definition, workflow_id=workflow_id)
+    return execute_plan(plan, max_concurrency=max_concurrency)
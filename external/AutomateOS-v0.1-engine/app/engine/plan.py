@@ -0,0 +1,245 @@
+"""Workflow compiler and per-process execution plan cache.
+
+``compile_workflow`` turns a ``Workflow.definition`` into an immutable
+``ExecutionPlan``: node classes are resolved through the registry, configs are
+validated (filter conditions are parsed and compiled here), and the
+dependency graph is checked and flattened. ``plan_cache`` keeps recent plans
+keyed by workflow id plus a hash of the definition, so repeated runs of the
+same workflow skip all of this work.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from app.core.config import settings
+from app.engine.nodes.base import BaseNode
+from app.engine.registry import NodeRegistry, node_registry
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    """A single resolved step. ``depends_on``/``ancestors``/``children`` hold 0-based step positions."""
+
+    index: int  # 1-based, as used in error messages
+    type: str
+    id: Optional[str]
+    node_class: Type[BaseNode]
+    config: Dict[str, Any]  # never handed to nodes directly; _execute_step passes a copy
+    depends_on: Tuple[int, ...]
+    ancestors: Tuple[int, ...]
+    children: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Immutable, ready-to-run form of a workflow definition."""
+
+    fingerprint: str
+    steps: Tuple[CompiledStep, ...]
+    is_dag: bool
+    max_concurrency: Optional[int]
+
+
+def definition_fingerprint(workflow_definition: Dict[str, Any]) -> str:
+    """Stable hash of a definition (key order does not matter)."""
+    canonical = json.dumps(workflow_definition, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _resolve_dependencies(steps: List[Dict[str, Any]]) -> List[List[int]]:
+    """Map every step to the (0-based) indexes of the steps it depends on.
+
+    Raises ValueError for duplicate ids, unknown references and cycles.
+    """
+    index_by_id: Dict[str, int] = {}
+    for i, step in enumerate(steps):
+        step_id = step.get("id")
+        if step_id is None:
+            continue
+        if not isinstance(step_id, str) or not step_id:
+            raise ValueError(f"Step {i + 1}: 'id' must be a non-empty string")
+        if step_id in index_by_id:
+            raise ValueError(f"Step {i + 1}: duplicate step id '{step_id}'")
+        index_by_id[step_id] = i
+
+    deps: List[List[int]] = []
+    for i, step in enumerate(steps):
+        raw = step.get("depends_on") or []
+        refs: List[str] = [raw] if isinstance(raw, str) else list(raw)
+        upstream: List[int] = []
+        for ref in refs:
+            if ref not in index_by_id:
+                raise ValueError(f"Step {i + 1}: depends_on references unknown step id '{ref}'")
+            if index_by_id[ref] == i:
+                raise ValueError(f"Step {i + 1}: a step cannot depend on itself")
+            upstream.append(index_by_id[ref])
+        deps.append(sorted(set(upstream)))
+
+    # Kahn's algorithm: every step must become ready eventually
+    pending = [len(d) for d in deps]
+    children = _children(deps)
+    ready = [i for i, n in enumerate(pending) if n == 0]
+    seen = 0
+    while ready:
+        current = ready.pop()
+        seen += 1
+        for child in children[current]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                ready.append(child)
+    if seen != len(steps):
+        raise ValueError("Workflow steps contain a dependency cycle")
+
+    return deps
+
+
+def _children(deps: List[List[int]]) -> List[List[int]]:
+    children: List[List[int]] = [[] for _ in deps]
+    for i, upstream in enumerate(deps):
+        for parent in upstream:
+            children[parent].append(i)
+    return children
+
+
+def _ancestors(deps: List[List[int]]) -> List[List[int]]:
+    """Transitive upstream steps of every step, in definition order."""
+    closure: List[Optional[List[int]]] = [None] * len(deps)
+
+    def visit(i: int) -> List[int]:
+        cached = closure[i]
+        if cached is not None:
+            return cached
+        found = set(deps[i])
+        for parent in deps[i]:
+            found.update(visit(parent))
+        result = sorted(found)
+        closure[i] = result
+        return result
+
+    return [visit(i) for i in range(len(deps))]
+
+
+def compile_workflow(
+    workflow_definition: Dict[str, Any],
+    registry: NodeRegistry = node_registry,
+    fingerprint: Optional[str] = None,
+) -> ExecutionPlan:
+    """Validate a definition and build its ExecutionPlan.
+
+    Raises ValueError for malformed steps/configs, ImportError/TypeError for unknown
+    or invalid node types; messages are prefixed with the offending step number.
+    """
+    steps: List[Dict[str, Any]] = workflow_definition.get("steps", []) or []
+
+    for idx, step in enumerate(steps, start=1):
+        node_type = step.get("type")
+        if not isinstance(node_type, str) or not node_type:
+            raise ValueError(f"Step {idx}: 'type' is required")
+
+    # Plain linear definitions keep their original, strictly sequential semantics.
+    is_dag = any(step.get("depends_on") for step in steps)
+    if is_dag:
+        deps = _resolve_dependencies(steps)
+    else:
+        deps = [[] for _ in steps]
+    ancestors = _ancestors(deps)
+    children = _children(deps)
+
+    compiled: List[CompiledStep] = []
+    for idx, step in enumerate(steps, start=1):
+        node_type = str(step["type"])
+        try:
+            node_class = registry.get(node_type)
+        except (ImportError, TypeError) as e:
+            raise type(e)(f"Step {idx}: {e}") from e
+
+        # Private copy: later edits to the definition must not leak into a cached plan.
+        config: Dict[str, Any] = copy.deepcopy(step.get("config", {}) or {})
+        try:
+            node_class.validate_config(config)
+        except ValueError as e:
+            raise ValueError(f"Step {idx} ({node_type}): {e}") from e
+
+        compiled.append(CompiledStep(
+            index=idx,
+            type=node_type,
+            id=step.get("id") or None,
+            node_class=node_class,
+            config=config,
+            depends_on=tuple(deps[idx - 1]),
+            ancestors=tuple(ancestors[idx - 1]),
+            children=tuple(children[idx - 1]),
+        ))
+
+    return ExecutionPlan(
+        fingerprint=fingerprint or definition_fingerprint(workflow_definition),
+        steps=tuple(compiled),
+        is_dag=is_dag,
+        max_concurrency=_max_concurrency(workflow_definition.get("max_concurrency")),
+    )
+
+
+def _max_concurrency(raw_limit: Any) -> Optional[int]:
+    # Missing, empty or 0 means "use the engine default".
+    if raw_limit is None or raw_limit == "" or raw_limit == 0:
+        return None
+    try:
+        if isinstance(raw_limit, bool) or int(raw_limit) != float(raw_limit):
+            raise ValueError
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        raise ValueError(f"Workflow: 'max_concurrency' must be a positive integer, got {raw_limit!r}") from None
+    if limit < 1:
+        raise ValueError(f"Workflow: 'max_concurrency' must be a positive integer, got {raw_limit!r}")
+    return limit
+
+
+class PlanCache:
+    """LRU cache of compiled plans keyed by ``(workflow_id, definition hash)``."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = max(1, maxsize)
+        self._plans: "OrderedDict[Tuple[Optional[int], str], ExecutionPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compile(self, workflow_definition: Dict[str, Any], workflow_id: Optional[int] = None) -> ExecutionPlan:
+        fingerprint = definition_fingerprint(workflow_definition)
+        key = (workflow_id, fingerprint)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        # Compile outside the lock; a concurrent duplicate compile is harmless.
+        plan = compile_workflow(workflow_definition, fingerprint=fingerprint)
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._plans), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# One cache per worker/API process.
+plan_cache = PlanCache(maxsize=settings.WORKFLOW_PLAN_CACHE_SIZE)
@@ -0,0 +1,86 @@
+"""Node registry: maps workflow step ``type`` strings to node classes.
+
+Built-in nodes are registered explicitly. Any other type is still loaded the
+plugin way (``app.engine.nodes.<type>`` -> ``<TypeInCamelCase>``), but only the
+first time it is seen; afterwards the class comes straight from the registry.
+"""
+from __future__ import annotations
+
+import threading
+from importlib import import_module
+from typing import Callable, Dict, List, Type
+
+from app.engine.nodes.base import BaseNode
+from app.engine.nodes.filter_node import FilterNode
+from app.engine.nodes.http_request_node import HttpRequestNode
+
+
+def class_name_from_node_type(node_type: str) -> str:
+    # http_request_node -> HttpRequestNode
+    return "".join(part.capitalize() for part in node_type.split("_"))
+
+
+class NodeRegistry:
+    """Thread-safe ``node_type -> BaseNode subclass`` lookup with plugin fallback."""
+
+    def __init__(self, package: str = "app.engine.nodes") -> None:
+        self._package = package
+        self._classes: Dict[str, Type[BaseNode]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, node_type: str, node_class: Type[BaseNode]) -> Type[BaseNode]:
+        if not isinstance(node_class, type) or not issubclass(node_class, BaseNode):
+            raise TypeError(f"'{getattr(node_class, '__name__', node_class)}' must subclass BaseNode")
+        with self._lock:
+            self._classes[node_type] = node_class
+        return node_class
+
+    def node(self, node_type: str) -> Callable[[Type[BaseNode]], Type[BaseNode]]:
+        """Decorator form of :meth:`register` for plugin modules."""
+        def decorator(node_class: Type[BaseNode]) -> Type[BaseNode]:
+            return self.register(node_type, node_class)
+        return decorator
+
+    def get(self, node_type: str) -> Type[BaseNode]:
+        """Return the class for ``node_type``, importing the plugin module on first use.
+
+        Raises ImportError when the module/class cannot be found and TypeError when
+        the resolved class does not subclass BaseNode.
+        """
+        node_class = self._classes.get(node_type)
+        if node_class is not None:
+            return node_class
+
+        module_path = f"{self._package}.{node_type}"
+        class_name = class_name_from_node_type(node_type)
+
+        # Import module
+        try:
+            module = import_module(module_path)
+        except Exception as e:
+            raise ImportError(f"cannot import module '{module_path}': {e}") from e
+
+        # Resolve class
+        try:
+            node_class = getattr(module, class_name)
+        except AttributeError as e:
+            raise ImportError(f"class '{class_name}' not found in '{module_path}'") from e
+
+        # Validate base class
+        if not isinstance(node_class, type) or not issubclass(node_class, BaseNode):
+            raise TypeError(f"'{class_name}' must subclass BaseNode")
+
+        return self.register(node_type, node_class)
+
+    def types(self) -> List[str]:
+        with self._lock:
+            return sorted(self._classes)
+
+    def __contains__(self, node_type: object) -> bool:
+        return node_type in self._classes
+
+
+# Process-wide registry used by the plan compiler.
+node_registry = NodeRegistry()
+node_registry.register("http_request_node", HttpRequestNode)
+node_registry.register("filter_node", FilterNode)
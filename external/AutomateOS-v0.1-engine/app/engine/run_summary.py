@@ -0,0 +1,125 @@
+"""Incremental maintenance of WorkflowRunSummary rows.
+
+The worker calls ``record_runs_started`` / ``record_runs_finished`` in the same
+session (and transaction) that inserts/updates the WorkflowRun rows. Updates are
+relative (``count = count + n``), so concurrent workers do not overwrite each other.
+``rebuild_run_summaries`` recomputes everything from the runs table (startup backfill).
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from sqlalchemy import case, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.models.workflow import WorkflowRun, WorkflowRunSummary
+
+# WorkflowRun status value -> summary counter column
+STATUS_COLUMNS: Dict[str, str] = {
+    status.value: f"{status.value}_count" for status in WorkflowRun.WorkflowRunStatus
+}
+
+
+def status_value(status: Any) -> str:
+    return str(getattr(status, "value", status))
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored as UTC.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def run_duration_ms(run: WorkflowRun) -> Optional[float]:
+    if run.finished_at is None or run.created_at is None:
+        return None
+    return (_as_utc(run.finished_at) - _as_utc(run.created_at)).total_seconds() * 1000
+
+
+def _apply(session: Session, workflow_id: int, increments: Dict[str, Any], last_run_at: Optional[datetime]) -> None:
+    """Add ``increments`` to the workflow's summary row, creating the row if needed."""
+    table = WorkflowRunSummary
+    values: Dict[str, Any] = {name: getattr(table, name) + amount for name, amount in increments.items()}
+    if last_run_at is not None:
+        values["last_run_at"] = case(
+            (table.last_run_at.is_(None), last_run_at),  # type: ignore[union-attr]
+            (table.last_run_at < last_run_at, last_run_at),  # type: ignore[operator]
+            else_=table.last_run_at,
+        )
+    stmt = update(table).where(table.workflow_id == workflow_id).values(**values)  # type: ignore[arg-type]
+    if session.execute(stmt).rowcount:  # type: ignore[attr-defined]
+        return
+
+    initial = {name: max(0, amount) if name == "running_count" else amount for name, amount in increments.items()}
+    try:
+        # Savepoint: another worker may insert the same row concurrently.
+        with session.begin_nested():
+            session.add(WorkflowRunSummary(workflow_id=workflow_id, last_run_at=last_run_at, **initial))
+    except IntegrityError:
+        session.execute(stmt)
+
+
+def record_runs_started(session: Session, runs: Iterable[WorkflowRun]) -> None:
+    """Count newly created runs (call before committing their INSERT)."""
+    increments: Dict[int, Dict[str, Any]] = defaultdict(lambda: defaultdict(int))
+    newest: Dict[int, datetime] = {}
+    for run in runs:
+        if run.workflow_id is None:
+            continue
+        column = STATUS_COLUMNS[status_value(run.status)]
+        increments[run.workflow_id]["total_count"] += 1
+        increments[run.workflow_id][column] += 1
+        created = _as_utc(run.created_at)
+        if run.workflow_id not in newest or created > newest[run.workflow_id]:
+            newest[run.workflow_id] = created
+    for workflow_id, amounts in increments.items():
+        _apply(session, workflow_id, dict(amounts), newest.get(workflow_id))
+
+
+def record_runs_finished(session: Session, runs: Sequence[WorkflowRun], previous_status: Any = WorkflowRun.WorkflowRunStatus.RUNNING) -> None:
+    """Move finished runs from ``previous_status`` to their final status and add their durations."""
+    previous_column = STATUS_COLUMNS[status_value(previous_status)]
+    increments: Dict[int, Dict[str, Any]] = defaultdict(lambda: defaultdict(int))
+    for run in runs:
+        if run.workflow_id is None:
+            continue
+        amounts = increments[run.workflow_id]
+        amounts[previous_column] -= 1
+        amounts[STATUS_COLUMNS[status_value(run.status)]] += 1
+        duration = run_duration_ms(run)
+        if duration is not None:
+            amounts["finished_count"] += 1
+            amounts["duration_ms_total"] += duration
+    for workflow_id, amounts in increments.items():
+        _apply(session, workflow_id, dict(amounts), None)
+
+
+def rebuild_run_summaries(session: Session) -> int:
+    """Recompute every summary row from the runs table; returns the number of rows written."""
+    summaries: Dict[int, WorkflowRunSummary] = {}
+    runs = session.exec(select(WorkflowRun).execution_options(yield_per=1000))
+    for run in runs:
+        if run.workflow_id is None:
+            continue
+        summary = summaries.get(run.workflow_id)
+        if summary is None:
+            summary = summaries[run.workflow_id] = WorkflowRunSummary(workflow_id=run.workflow_id)
+        summary.total_count += 1
+        column = STATUS_COLUMNS.get(status_value(run.status))
+        if column:
+            setattr(summary, column, getattr(summary, column) + 1)
+        if run.created_at is not None:
+            created = _as_utc(run.created_at)
+            if summary.last_run_at is None or created > summary.last_run_at:
+                summary.last_run_at = created
+        duration = run_duration_ms(run)
+        if duration is not None:
+            summary.finished_count += 1
+            summary.duration_ms_total += duration
+
+    session.execute(delete(WorkflowRunSummary))
+    session.add_all(summaries.values())
+    session.commit()
+    return len(summaries)
@@ -1,51 +1,148 @@
 # Worker Task that Use Orchestrator.
-from sqlmodel import Session
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Sequence, Tuple, TypeVar
 
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.metrics import metrics, workflow_runs
+from app.core.structured_log import event_logger, log_event
 from app.db.session import engine # For worker use
 from app.models.workflow import Workflow, WorkflowRun
 from datetime import datetime, timezone
 from app.engine.orchestrator import run_workflow
+from app.engine.run_summary import record_runs_finished, record_runs_started
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def flushes_event_log(func: F) -> F:
+    """Write the job's queued log records before returning.
+
+    A forked work horse (WORKER_FORK=1) ends with ``os._exit``, which would
+    otherwise discard whatever the background writer had not written yet.
+    """
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            event_logger.flush()
+
+    return wrapper  # type: ignore[return-value]
+
+
+def execute_definition(workflow_id: int, definition: Dict[str, Any]) -> Tuple[WorkflowRun.WorkflowRunStatus, Dict[str, Any], datetime]:
+    """Run one workflow definition; returns the final status, logs and finish time (never raises)."""
+    try:
+        # Call the orchestrator to run the workflow.
+        final_output = run_workflow(definition, workflow_id=workflow_id)
+        status, logs = WorkflowRun.WorkflowRunStatus.SUCCESS, {"final_output": final_output}
+        log_event("worker.workflow.succeeded", workflowId=workflow_id)
+    except Exception as e:
+        status, logs = WorkflowRun.WorkflowRunStatus.FAILED, {"error": str(e)}
+        log_event("worker.workflow.failed", level="warning", workflowId=workflow_id, error=str(e))
+    if metrics.enabled:
+        workflow_runs.inc(status=status.value)
+    # Stamped here, per run: in a batch the other runs may finish much later.
+    return status, logs, datetime.now(timezone.utc)
 
 
+def fail_unfinished(run_logs: Sequence[WorkflowRun], reason: str) -> None:
+    """Mark runs the job never finished (timeout, worker error) as FAILED instead of leaving them RUNNING."""
+    finished_at = datetime.now(timezone.utc)
+    for run_log in run_logs:
+        if run_log.finished_at is None:
+            run_log.status = WorkflowRun.WorkflowRunStatus.FAILED
+            run_log.logs = {"error": reason}
+            run_log.finished_at = finished_at
+            log_event("worker.workflow.unfinished", level="error", workflowId=run_log.workflow_id, error=reason)
+
+
+@flushes_event_log
 def process_workflow(workflow_id: int):
     """
     The main task executed by the RQ worker.
     It fetches a workflow from the database and passes it to the orchestrator.
     """
-    print(f"WORKER: Received job. Processing workflow ID: {workflow_id}")
-    
+    log_event("worker.job.received", workflowId=workflow_id)
+
     # "Worker-Side Database Session"
     with Session(engine) as session:
         # Fetch the workflow definition from the database with primary_key.
         workflow = session.get(Workflow, workflow_id)
 
         if not workflow:
-            print(f"WORKER: Error - Workflow with ID {workflow_id} not found.")
+            log_event("worker.workflow.not_found", level="error", workflowId=workflow_id)
             return
 
         # Create a new WorkflowRun record to track this execution.
         run_log = WorkflowRun(workflow_id=workflow_id, status=WorkflowRun.WorkflowRunStatus.RUNNING, logs={})
         session.add(run_log)
+        record_runs_started(session, [run_log])
         session.commit()
         session.refresh(run_log)
 
         try:
-            # Call the orchestrator to run the workflow.
-            final_output = run_workflow(workflow.definition)
+            run_log.status, run_log.logs, run_log.finished_at = execute_definition(workflow_id, workflow.definition)
 
-            run_log.status = WorkflowRun.WorkflowRunStatus.SUCCESS
-            run_log.logs = {"final_output": final_output}
-            run_log.finished_at = datetime.now(timezone.utc)
-            print(f"WORKER: Successfully process workflow ID: {workflow_id}")
+        finally:
+            # Commit the final status (either "Success" or "Failed")
+            fail_unfinished([run_log], "worker stopped before the run finished")
+            session.add(run_log)
+            record_runs_finished(session, [run_log])
+            session.commit()
 
-        except Exception as e:
-            run_log.status = WorkflowRun.WorkflowRunStatus.FAILED
-            run_log.logs = {"error": str(e)}
-            run_log.finished_at = datetime.now(timezone.utc)
 
-            print(f"WORKER: Failed to process workflow ID: {workflow_id}. Error: {e}")
+@flushes_event_log
+def process_workflow_batch(workflow_ids: List[int]):
+    """
+    Batched variant of ``process_workflow`` for bulk webhook triggers.
+
+    One query loads every definition, one transaction inserts all RUNNING runs,
+    the workflows execute concurrently (up to WORKFLOW_MAX_CONCURRENCY), and one
+    transaction stores every final status. Each id gets its own WorkflowRun,
+    duplicates included; unknown ids are skipped.
+    """
+    log_event("worker.batch.received", count=len(workflow_ids))
+
+    # expire_on_commit=False: reuse the loaded rows after each commit without re-SELECTs.
+    with Session(engine, expire_on_commit=False) as session:
+        unique_ids = sorted(set(workflow_ids))
+        workflows = session.exec(select(Workflow).where(Workflow.id.in_(unique_ids))).all()  # type: ignore[union-attr]
+        definitions: Dict[int, Dict[str, Any]] = {w.id: w.definition for w in workflows if w.id is not None}
 
+        for missing_id in unique_ids:
+            if missing_id not in definitions:
+                log_event("worker.workflow.not_found", level="error", workflowId=missing_id)
+
+        run_logs = [
+            WorkflowRun(workflow_id=wid, status=WorkflowRun.WorkflowRunStatus.RUNNING, logs={})
+            for wid in workflow_ids
+            if wid in definitions
+        ]
+        if not run_logs:
+            return
+        session.add_all(run_logs)
+        record_runs_started(session, run_logs)
+        session.commit()
+
+        pool = ThreadPoolExecutor(max_workers=max(1, settings.WORKFLOW_MAX_CONCURRENCY), thread_name_prefix="workflow-batch")
+        try:
+            futures = {
+                pool.submit(execute_definition, run_log.workflow_id, definitions[run_log.workflow_id]): run_log
+                for run_log in run_logs
+            }
+            for future in as_completed(futures):
+                run_log = futures[future]
+                run_log.status, run_log.logs, run_log.finished_at = future.result()
         finally:
-            # Commit the final status (either "Success" or "Failed")
-            session.add(run_log)
-            session.commit()
\ No newline at end of file
+            # On a job timeout, don't wait for (or start) the remaining workflows.
+            pool.shutdown(wait=False, cancel_futures=True)
+            fail_unfinished(run_logs, "batch job stopped before the run finished (timeout or worker error)")
+            # Commit every final status in a single transaction.
+            session.add_all(run_logs)
+            record_runs_finished(session, run_logs)
+            session.commit()
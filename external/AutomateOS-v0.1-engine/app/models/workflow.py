@@ -2,7 +2,7 @@ from typing import List, TYPE_CHECKING, Dict, Any
 from datetime import datetime, timezone
 from enum import Enum
 from sqlmodel import Field, Relationship, SQLModel, Column, JSON
-from sqlalchemy import String
+from sqlalchemy import Index, String
 
 # TYPE_CHECKING is used to avoid circular imports while still providing type hints
 # This allows us to reference User class without importing it at runtime
@@ -55,6 +55,14 @@ class WorkflowRun(SQLModel, table=True):
         FAILED = "failed"
         CANCELED = "canceled"
 
+    # Composite indexes for history queries:
+    # - keyset pagination: WHERE workflow_id = ? ORDER BY created_at DESC, id DESC
+    # - status-filtered listings: WHERE workflow_id = ? AND status = ? ORDER BY created_at DESC
+    __table_args__ = (
+        Index("ix_workflowrun_workflow_created_id", "workflow_id", "created_at", "id"),
+        Index("ix_workflowrun_workflow_status_created", "workflow_id", "status", "created_at"),
+    )
+
     # Primary key for the workflow run table
     id: int | None = Field(default=None, primary_key=True)
     
@@ -76,4 +84,32 @@ class WorkflowRun(SQLModel, table=True):
     workflow_id: int | None = Field(default=None, foreign_key="workflow.id")
     
     # Relationship to the Workflow model (many runs to one workflow)
-    workflow: "Workflow" = Relationship(back_populates="runs")
\ No newline at end of file
+    workflow: "Workflow" = Relationship(back_populates="runs")
+
+# == Initailize [Declare]== | Declarative Style for SQLModel
+class WorkflowRunSummary(SQLModel, table=True):
+    """
+    Incrementally maintained per-workflow run statistics.
+
+    Updated in the same transaction that creates/finishes a WorkflowRun
+    (see app/engine/run_summary.py), so run counts and dashboards are a
+    single primary-key lookup instead of a COUNT(*) over every run.
+    """
+
+    # One row per workflow
+    workflow_id: int = Field(foreign_key="workflow.id", primary_key=True)
+
+    # Run counts (total and by WorkflowRun.WorkflowRunStatus)
+    total_count: int = Field(default=0)
+    pending_count: int = Field(default=0)
+    running_count: int = Field(default=0)
+    success_count: int = Field(default=0)
+    failed_count: int = Field(default=0)
+    canceled_count: int = Field(default=0)
+
+    # Creation time of the newest run
+    last_run_at: datetime | None = Field(default=None)
+
+    # Duration totals for the average (finished runs only)
+    finished_count: int = Field(default=0)
+    duration_ms_total: float = Field(default=0.0)
@@ -11,3 +11,4 @@ class Token(SQLModel):
 # [[The data embeded withtin the JWT]]
 class TokenPayload(SQLModel):
     sub: str | None = None # 'sub' is the standard JWT claim for "subject"
+    exp: int | None = None # Expiration Timestamp (used to bound auth cache entries)
@@ -0,0 +1,18 @@
+# Webhook API Schemas (data shapes)
+from __future__ import annotations
+
+from typing import List
+from sqlmodel import SQLModel, Field
+
+from app.core.config import settings
+
+# Bulk trigger request body.
+# [[ One entry per run; repeating an id queues that workflow more than once. ]]
+class WebhookBatchTrigger(SQLModel):
+    workflow_ids: List[int] = Field(min_length=1, max_length=settings.WEBHOOK_BATCH_MAX_IDS)
+
+# Bulk trigger response.
+class WebhookBatchQueued(SQLModel):
+    message: str
+    queued: int
+    jobs: int
@@ -35,3 +35,12 @@ class WorkflowRunRead(BaseSchema, SQLModel):
     logs: Dict[str, Any]
     created_at: datetime
     finished_at: datetime | None
+
+
+# Reading per-workflow run statistics (history API)
+class WorkflowRunSummaryRead(BaseSchema, SQLModel):
+    workflow_id: int
+    total: int
+    counts: Dict[str, int]  # keyed by run status
+    last_run_at: datetime | None
+    avg_duration_ms: float | None
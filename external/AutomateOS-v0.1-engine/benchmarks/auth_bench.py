@@ -0,0 +1,108 @@
+"""Authenticated request latency benchmark (offline, in-process).
+
+Measures p50/p99 latency of an authenticated endpoint (GET /api/v1/workflows/)
+through the full FastAPI stack, against a throwaway SQLite database:
+
+- "uncached": auth cache disabled -> JWT decode + User SELECT on every request (old path)
+- "cached":   auth cache enabled  -> token/principal served from memory
+- "login_storm_inline":  same requests while concurrent logins run bcrypt on the event loop
+- "login_storm_offload": same, with bcrypt on the dedicated thread pool
+
+Run from the engine root:
+  python benchmarks/auth_bench.py [--requests 500] [--logins 20]
+Prints a JSON report to stdout.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from common import percentiles, use_throwaway_env
+
+# Throwaway SQLite DB and quiet engine before any app module is imported.
+use_throwaway_env("automateos-auth-bench-")
+
+import httpx
+
+import app.core.security as security
+from app.core.auth_cache import auth_cache
+from app.db.session import create_db_and_tables, engine
+from main import app
+
+engine.echo = False
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password-123"
+
+
+async def timed_requests(client: httpx.AsyncClient, headers: Dict[str, str], count: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(count):
+        started = time.perf_counter()
+        r = await client.get("/api/v1/workflows/", headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert r.status_code == 200, r.text
+    return samples
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    r = await client.post("/api/v1/login", data={"username": EMAIL, "password": PASSWORD})
+    assert r.status_code == 200, r.text
+    return r.json()["access_token"]
+
+
+async def scenario(client: httpx.AsyncClient, token: str, requests: int, logins: int) -> Dict[str, float]:
+    headers = {"Authorization": f"Bearer {token}"}
+    await timed_requests(client, headers, 5)  # warm-up
+    if logins:
+        storm = [asyncio.create_task(login(client)) for _ in range(logins)]
+        samples = await timed_requests(client, headers, requests)
+        await asyncio.gather(*storm)
+    else:
+        samples = await timed_requests(client, headers, requests)
+    return percentiles(samples)
+
+
+async def run(requests: int, logins: int) -> Dict[str, Any]:
+    create_db_and_tables()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.post("/api/v1/register", json={"email": EMAIL, "password": PASSWORD, "name": "Bench"})
+        assert r.status_code in (201, 400), r.text
+        token = await login(client)
+
+        results: Dict[str, Any] = {}
+        auth_cache.enabled = False
+        results["uncached"] = await scenario(client, token, requests, 0)
+        auth_cache.enabled = True
+        auth_cache.clear()
+        results["cached"] = await scenario(client, token, requests, 0)
+
+        pool = security.bcrypt_pool
+        security.bcrypt_pool = None
+        results["login_storm_inline"] = await scenario(client, token, requests, logins)
+        security.bcrypt_pool = pool
+        results["login_storm_offload"] = await scenario(client, token, requests, logins)
+
+    return {
+        "benchmark": "auth_latency",
+        "requests_per_scenario": requests,
+        "concurrent_logins": logins,
+        "results": results,
+        "auth_cache": auth_cache.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+    report = asyncio.run(run(args.requests, args.logins))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
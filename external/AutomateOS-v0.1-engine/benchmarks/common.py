@@ -0,0 +1,41 @@
+"""Helpers shared by the offline benchmarks (engine_bench.py, auth_bench.py).
+
+Call ``use_throwaway_env`` before importing any app module: settings and the
+database engine are created at import time from the environment.
+Benchmarks and the offline tests need fakeredis: pip install -r requirements-dev.txt
+"""
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import tempfile
+from typing import Dict, List
+
+ENGINE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def use_throwaway_env(prefix: str) -> str:
+    """Point the app at a temporary SQLite DB and blob dir, quiet the event log; returns the temp dir."""
+    tmp_dir = tempfile.mkdtemp(prefix=prefix)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    os.environ["BLOB_STORE_DIR"] = os.path.join(tmp_dir, "blobs")
+    os.environ.setdefault("LOG_LEVEL", "error")
+    if ENGINE_ROOT not in sys.path:
+        sys.path.insert(0, ENGINE_ROOT)
+    return tmp_dir
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p99_ms": pick(0.99),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
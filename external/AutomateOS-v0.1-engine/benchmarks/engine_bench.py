@@ -0,0 +1,419 @@
+"""End-to-end engine benchmark suite (offline, in-process).
+
+Everything runs locally: a stub HTTP server stands in for HttpRequestNode
+targets, fakeredis + an in-process worker (the BatchingWorker that worker.py runs
+by default, or a plain rq SimpleWorker) replace Redis and the worker container,
+and a throwaway SQLite database replaces Postgres.
+
+Scenarios (each across workflow sizes and/or concurrency levels):
+- "orchestrator":  run_workflow() per-run and per-step overhead, linear vs DAG,
+                   for in-process filter steps and HTTP steps against the stub
+- "webhook":       POST /api/v1/webhooks/{id} and /batch -> worker drained ->
+                   finished WorkflowRun rows; enqueue latency and runs/sec.
+                   Single triggers are drained by both workers, labelled
+                   "simple_worker" (WORKER_DRAIN_BATCH=false) and
+                   "batching_worker" (the default)
+- "execute":       POST /v1/execute accept latency and completion latency
+                   (via the run store's event stream) at N concurrent clients
+- "memory":        tracemalloc bytes retained / peak per run, plus the JSON size
+                   of what would be written to WorkflowRun.logs, for small and
+                   large HTTP payloads at N runs in flight at once
+
+Run from the engine root (needs fakeredis: pip install -r requirements-dev.txt):
+  python benchmarks/engine_bench.py [--quick] [--only orchestrator,webhook] [--output bench.json]
+  python benchmarks/engine_bench.py --compare before.json after.json
+Prints a JSON report to stdout (and writes it to --output when given). With
+--compare, prints the relative change of every numeric metric instead.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from common import ENGINE_ROOT, percentiles, use_throwaway_env
+
+# Throwaway SQLite DB / blob dir and a quiet engine before any app module is imported.
+use_throwaway_env("automateos-engine-bench-")
+
+import fakeredis
+import httpx
+from rq import Queue, SimpleWorker
+from sqlmodel import Session, select
+
+import app.api.v1.endpoints.webhooks as webhooks_module
+import app.core.queue as queue_module
+from app.core.config import settings
+from app.core.http_client import http_clients
+from app.core.run_store import run_store
+from app.db.session import create_db_and_tables, engine
+from app.engine.batch_worker import BatchingWorker
+from app.engine.orchestrator import run_workflow
+from app.engine.plan import plan_cache
+from app.models.user import User
+from app.models.workflow import Workflow, WorkflowRun
+from main import app
+
+engine.echo = False
+logging.getLogger("rq").setLevel(logging.WARNING)
+
+
+# === Local stub upstream ===
+class StubHandler(BaseHTTPRequestHandler):
+    """``GET|POST /bytes/<n>`` returns an n-byte JSON document; anything else a tiny one."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, Nagle + delayed ACK add ~40ms.
+    disable_nagle_algorithm = True
+    _bodies: Dict[int, bytes] = {}
+
+    def _respond(self) -> None:
+        # Drain the request body so keep-alive connections stay in sync.
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        size = 0
+        if self.path.startswith("/bytes/"):
+            size = int(self.path.rsplit("/", 1)[1])
+        body = self._bodies.get(size)
+        if body is None:
+            filler = "x" * max(0, size - 16)
+            body = self._bodies[size] = json.dumps({"ok": True, "data": filler}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_stub_server() -> Tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="bench-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# === Helpers ===
+def definition(kind: str, steps: int, base_url: str, shape: str = "linear", payload_bytes: int = 0) -> Dict[str, Any]:
+    """``steps`` nodes of ``kind`` ("filter" or "http"); "dag" fans out from the first step."""
+    nodes: List[Dict[str, Any]] = []
+    for i in range(steps):
+        if kind == "http":
+            node: Dict[str, Any] = {"type": "http_request_node", "config": {"url": f"{base_url}/bytes/{payload_bytes}"}}
+        else:
+            node = {"type": "filter_node", "config": {"condition": "True"}}
+        node["id"] = f"s{i}"
+        if shape == "dag" and i > 0:
+            node["depends_on"] = "s0"
+        nodes.append(node)
+    return {"steps": nodes}
+
+
+def time_runs(workflow: Dict[str, Any], iterations: int) -> List[float]:
+    run_workflow(workflow)  # warm-up: compiles and caches the plan, opens connections
+    samples: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run_workflow(workflow)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def create_bench_user() -> int:
+    with Session(engine) as s:
+        user = s.exec(select(User).where(User.email == "engine-bench@example.com")).first()
+        if user is None:
+            user = User(email="engine-bench@example.com", name="Bench", hashed_password="x")
+            s.add(user)
+            s.commit()
+            s.refresh(user)
+        assert user.id is not None
+        return user.id
+
+
+def create_workflows(user_id: int, workflow: Dict[str, Any], count: int) -> List[int]:
+    with Session(engine) as s:
+        rows = [Workflow(name=f"Bench {i}", definition=workflow, user_id=user_id) for i in range(count)]
+        s.add_all(rows)
+        s.commit()
+        return [row.id for row in rows if row.id is not None]
+
+
+def finished_runs(workflow_ids: List[int]) -> int:
+    with Session(engine) as s:
+        runs = s.exec(select(WorkflowRun).where(WorkflowRun.workflow_id.in_(workflow_ids))).all()  # type: ignore[union-attr]
+    return sum(1 for run in runs if run.finished_at is not None)
+
+
+# === Scenarios ===
+def bench_orchestrator(base_url: str, sizes: List[int], iterations: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for kind in ("filter", "http"):
+        for shape in ("linear", "dag"):
+            for steps in sizes:
+                samples = time_runs(definition(kind, steps, base_url, shape), iterations)
+                stats = percentiles(samples)
+                stats["per_step_us"] = round(stats["p50_ms"] * 1000 / steps, 2)
+                results[f"{kind}.{shape}.steps_{steps}"] = stats
+    return results
+
+
+def bench_webhook(base_url: str, sizes: List[int], concurrency: List[int], triggers: int) -> Dict[str, Any]:
+    user_id = create_bench_user()
+    fake_redis = fakeredis.FakeStrictRedis()
+    queue = Queue(connection=fake_redis)
+    # The batch helper reads app.core.queue.q at call time; the single route imported q by name.
+    queue_module.q = queue
+    webhooks_module.q = queue
+    transport = httpx.ASGITransport(app=app)
+
+    async def post_all(paths_and_bodies: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[float]:
+        samples: List[float] = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path, body in paths_and_bodies:
+                started = time.perf_counter()
+                r = await client.post(path, json=body)
+                samples.append((time.perf_counter() - started) * 1000)
+                assert r.status_code == 202, r.text
+        return samples
+
+    def drain(worker_class: type = BatchingWorker) -> float:
+        started = time.perf_counter()
+        worker_class([queue], connection=fake_redis).work(burst=True, logging_level="WARNING")
+        return time.perf_counter() - started
+
+    results: Dict[str, Any] = {}
+    original_concurrency = settings.WORKFLOW_MAX_CONCURRENCY
+    try:
+        for steps in sizes:
+            # One job per trigger (POST /webhooks/{id}): a SimpleWorker runs them one by one,
+            # the BatchingWorker drains up to WORKFLOW_BATCH_SIZE of them per execution.
+            for label, worker_class in (("simple_worker", SimpleWorker), ("batching_worker", BatchingWorker)):
+                ids = create_workflows(user_id, definition("http", steps, base_url), triggers)
+                started = time.perf_counter()
+                enqueue = asyncio.run(post_all([(f"/api/v1/webhooks/{wid}", None) for wid in ids]))
+                drain_s = drain(worker_class)
+                total_s = time.perf_counter() - started
+                assert finished_runs(ids) == len(ids)
+                results[f"single.{label}.steps_{steps}"] = {
+                    "triggers": len(ids),
+                    "enqueue": percentiles(enqueue),
+                    "drain_s": round(drain_s, 4),
+                    "runs_per_s": round(len(ids) / total_s, 2),
+                }
+
+            # Batched: one POST, WORKFLOW_BATCH_SIZE ids per job, runs in parallel inside each job.
+            for level in concurrency:
+                settings.WORKFLOW_MAX_CONCURRENCY = level
+                batch_ids = create_workflows(user_id, definition("http", steps, base_url), triggers)
+                started = time.perf_counter()
+                enqueue = asyncio.run(post_all([("/api/v1/webhooks/batch", {"workflow_ids": batch_ids})]))
+                drain_s = drain()
+                total_s = time.perf_counter() - started
+                assert finished_runs(batch_ids) == len(batch_ids)
+                results[f"batch.steps_{steps}.concurrency_{level}"] = {
+                    "triggers": len(batch_ids),
+                    "enqueue_ms": round(enqueue[0], 3),
+                    "drain_s": round(drain_s, 4),
+                    "runs_per_s": round(len(batch_ids) / total_s, 2),
+                }
+    finally:
+        settings.WORKFLOW_MAX_CONCURRENCY = original_concurrency
+    return results
+
+
+def bench_execute(base_url: str, sizes: List[int], concurrency: List[int], runs: int) -> Dict[str, Any]:
+    async def one_run(client: httpx.AsyncClient, dag: Dict[str, Any]) -> Tuple[float, float]:
+        started = time.perf_counter()
+        r = await client.post("/v1/execute", json={"dag": dag})
+        accepted = (time.perf_counter() - started) * 1000
+        assert r.status_code == 200, r.text
+        engine_run_id = r.json()["engineRunId"]
+        async for _ in run_store.subscribe(engine_run_id, heartbeat=1.0):
+            pass
+        record = run_store.get(engine_run_id) or {}
+        assert record.get("status") == "succeeded", record
+        return accepted, (time.perf_counter() - started) * 1000
+
+    async def scenario(dag: Dict[str, Any], level: int) -> Dict[str, Any]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await one_run(client, dag)  # warm-up
+            pending = asyncio.Semaphore(level)
+
+            async def limited() -> Tuple[float, float]:
+                async with pending:
+                    return await one_run(client, dag)
+
+            started = time.perf_counter()
+            samples = await asyncio.gather(*(limited() for _ in range(runs)))
+            elapsed = time.perf_counter() - started
+        return {
+            "accept": percentiles([a for a, _ in samples]),
+            "complete": percentiles([c for _, c in samples]),
+            "runs_per_s": round(runs / elapsed, 2),
+        }
+
+    async def all_scenarios() -> Dict[str, Any]:
+        # One event loop for every case: the async HTTP pool and run slots are loop-bound.
+        results: Dict[str, Any] = {}
+        for steps in sizes:
+            dag = {"nodes": [{"id": f"s{i}", "type": "http", "config": {"url": f"{base_url}/bytes/0"}} for i in range(steps)]}
+            for level in concurrency:
+                results[f"steps_{steps}.concurrency_{level}"] = await scenario(dag, level)
+        await http_clients.aclose()
+        return results
+
+    return asyncio.run(all_scenarios())
+
+
+def bench_memory(base_url: str, sizes: List[int], concurrency: List[int], runs: int, payloads: List[int]) -> Dict[str, Any]:
+    """Retained and peak bytes; ``concurrency`` runs are in flight at once (as in a batch or /v1/execute)."""
+    results: Dict[str, Any] = {}
+    for payload in payloads:
+        for steps in sizes:
+            workflow = definition("http", steps, base_url, payload_bytes=payload)
+            run_workflow(workflow)  # warm-up outside the measurement
+            for level in concurrency:
+                with ThreadPoolExecutor(max_workers=level, thread_name_prefix="bench-memory") as pool:
+                    tracemalloc.start()
+                    before, _ = tracemalloc.get_traced_memory()
+                    tracemalloc.reset_peak()
+                    # Keep every result alive, as the worker does until the run rows are committed.
+                    kept = list(pool.map(lambda _: run_workflow(workflow), range(runs)))
+                    current, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                logs_bytes = len(json.dumps({"final_output": kept[-1]}, default=str).encode("utf-8"))
+                results[f"payload_{payload}.steps_{steps}.concurrency_{level}"] = {
+                    "runs": runs,
+                    "retained_bytes_per_run": int((current - before) / runs),
+                    "peak_bytes": int(peak - before),
+                    "run_logs_bytes": logs_bytes,
+                }
+                del kept
+    return results
+
+
+# === Report / comparison ===
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ENGINE_ROOT, capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def flatten(value: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Relative change (percent) of every numeric metric present in both reports."""
+    before = dict(flatten(baseline.get("results", {})))
+    after = dict(flatten(current.get("results", {})))
+    changes: Dict[str, Any] = {}
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        changes[key] = {
+            "baseline": old,
+            "current": new,
+            "change_pct": round((new - old) / old * 100, 2) if old else None,
+        }
+    return {
+        "baseline": baseline.get("meta", {}).get("git"),
+        "current": current.get("meta", {}).get("git"),
+        "changes": changes,
+    }
+
+
+SCENARIOS = ("orchestrator", "webhook", "execute", "memory")
+
+
+def run(only: List[str], quick: bool) -> Dict[str, Any]:
+    sizes = [1, 5, 20] if quick else [1, 5, 20, 50]
+    concurrency = [1, 8] if quick else [1, 4, 16, 32]
+    iterations = 20 if quick else 100
+    triggers = 20 if quick else 100
+
+    create_db_and_tables()
+    server, base_url = start_stub_server()
+    benches: Dict[str, Callable[[], Dict[str, Any]]] = {
+        "orchestrator": lambda: bench_orchestrator(base_url, sizes, iterations),
+        "webhook": lambda: bench_webhook(base_url, sizes[:2], concurrency, triggers),
+        "execute": lambda: bench_execute(base_url, sizes[:2], concurrency, iterations),
+        "memory": lambda: bench_memory(base_url, sizes, concurrency, 10 if quick else 50, [256, 1024 * 1024]),
+    }
+    results: Dict[str, Any] = {}
+    durations: Dict[str, float] = {}
+    try:
+        for name in only:
+            started = time.perf_counter()
+            results[name] = benches[name]()
+            durations[name] = round(time.perf_counter() - started, 3)
+    finally:
+        server.shutdown()
+        http_clients.close()
+
+    return {
+        "benchmark": "engine",
+        "meta": {
+            "git": git_revision(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+            "sizes": sizes,
+            "concurrency": concurrency,
+            "scenario_seconds": durations,
+            "node_output_max_bytes": settings.NODE_OUTPUT_MAX_BYTES,
+            "plan_cache": plan_cache.stats(),
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer sizes and iterations (smoke run)")
+    parser.add_argument("--only", default=",".join(SCENARIOS), help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two saved reports")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f_old, open(args.compare[1], encoding="utf-8") as f_new:
+            print(json.dumps(compare(json.load(f_old), json.load(f_new)), indent=2))
+        return
+
+    only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in only if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    report = run(only, args.quick)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,17 @@
 
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, APIRouter, HTTPException
-from fastapi.responses import Response
-from typing import Dict, Any, Callable, Awaitable, Optional, List, cast
-import time, json, uuid
+from fastapi.responses import Response, StreamingResponse
+from typing import Dict, Any, AsyncIterator, Callable, Awaitable, Optional, List, Set, cast
+import asyncio, time, json, uuid
 
+from app.core.auth_cache import auth_cache
+from app.core.config import settings
+from app.core.http_client import http_clients
+from app.core.metrics import http_request_duration, metrics, process_gauges, queue_depth_collector
+from app.core.queue import q
+from app.core.run_store import RunStoreFull, run_store, utc_ts
+from app.core.structured_log import MaskedHeaders, event_logger, log_event
 from app.db.session import create_db_and_tables
 from app.api.v1.endpoints import auth, workflows, webhooks
 
@@ -13,6 +20,7 @@ from app.api.v1.endpoints import auth, workflows, webhooks
 # === Lifespan (startup/shutdown) ===
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global _run_slots
     print("Starting Automate OS Engine...")
     create_db_and_tables()
     print("Database tables created successfully")
@@ -23,7 +31,16 @@ async def lifespan(app: FastAPI):
     
     # SHUTDOWN
     print("Shutting down Automate OS Engine...")
+    for task in list(_run_tasks):
+        task.cancel()
+    await asyncio.gather(*_run_tasks, return_exceptions=True)
+    # The semaphore belongs to this event loop; the next lifespan may run on another.
+    _run_slots = None
+    log_event("http.pool.stats", **http_clients.stats())
+    await http_clients.aclose()
+    run_store.close()
     # [[Add any cleanup code here -- For example: close database connections, cleanup resources, etc.]]
+    event_logger.close()
     print("Cleanup completed") # [[ needed ?]]
     
 # === FastAPI Application Setup ===
@@ -33,62 +50,65 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-SENSITIVE_HEADER_KEYS = {"authorization", "x-api-key", "api-key", "x-auth-token"}
-
-def mask_value(v: str) -> str:
-    if not v:
-        return v
-    if len(v) <= 6:
-        return "*" * len(v)
-    return v[:3] + "***" + v[-2:]
-
-def mask_headers(headers: Dict[str, Any]) -> Dict[str, Any]:
-    out: Dict[str, Any] = {}
-    for k, v in headers.items():
-        if k.lower() in SENSITIVE_HEADER_KEYS:
-            out[k] = mask_value(str(v))
-        else:
-            out[k] = v
-    return out
-
-def log_event(event: str, **fields: Any) -> None:
-    rec: Dict[str, Any] = {"ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), "event": event, **fields}
-    print(json.dumps(rec, ensure_ascii=False))
+# Structured logs go through the batched background writer (app/core/structured_log.py).
 
 @app.middleware("http")
 async def add_request_context(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
-    start = time.time()
+    start = time.perf_counter()
     request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
     run_id = request.headers.get("x-run-id") or None
+    # Headers are masked by the writer thread, and only when LOG_REQUEST_HEADERS is on.
+    extra: Dict[str, Any] = {"headers": MaskedHeaders(request.headers)} if settings.LOG_REQUEST_HEADERS else {}
     log_event(
         "request.in",
         requestId=request_id,
         method=request.method,
         path=request.url.path,
-        headers=mask_headers(dict(request.headers)),
         runId=run_id,
+        **extra,
     )
     response = await call_next(request)
-    duration_ms = int((time.time() - start) * 1000)
+    elapsed = time.perf_counter() - start
+    if metrics.enabled:
+        # Label by route template (/api/v1/workflows/{workflow_id}), not the raw path.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_request_duration.observe(elapsed, method=request.method, route=route, status=str(response.status_code))
     log_event(
         "request.out",
         requestId=request_id,
         method=request.method,
         path=request.url.path,
         statusCode=response.status_code,
-        durationMs=duration_ms,
+        durationMs=int(elapsed * 1000),
         runId=run_id,
     )
     return response
 
+# === Metrics (Prometheus text format) ===
+def _api_gauges():
+    """Scrape-time gauges only the API has: the /v1/execute run store and the auth cache."""
+    run_stats = run_store.stats()
+    yield "automateos_engine_runs_active", "Active /v1/execute runs.", {}, run_stats["active"]
+    yield "automateos_engine_runs_in_memory", "/v1/execute runs held in the run store.", {}, run_stats["inMemory"]
+    for name, cache in (("tokens", auth_cache.tokens), ("users", auth_cache.users)):
+        yield "automateos_auth_cache_entries", "Auth cache entries.", {"cache": name}, cache.stats()["size"]
+
+metrics.register_collector(process_gauges)
+metrics.register_collector(_api_gauges)
+metrics.register_collector(queue_depth_collector(q))
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics() -> Response:
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # === Root Endpoint ===
 @app.get("/")
 def read_root():
     return {"message": "AutomateOS Engine is running"}
 
-# === In-memory run store (prototype) ===
-runs: Dict[str, Dict[str, Any]] = {}
-
+# === Bounded in-memory run store (see app/core/run_store.py) ===
 def _new_run_record(engine_run_id: str, run_id: Optional[str], dag: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "id": engine_run_id,
@@ -97,9 +117,120 @@ def _new_run_record(engine_run_id: str, run_id: Optional[str], dag: Dict[str, An
         "steps": [],
         "logs": [],
         "dag": dag,
-        "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "createdAt": utc_ts(),
     }
 
+# Background runs: strong references keep tasks alive; the semaphore caps concurrent runs.
+_run_tasks: Set["asyncio.Task[None]"] = set()
+_run_slots: Optional[asyncio.Semaphore] = None
+
+def _run_slot() -> asyncio.Semaphore:
+    global _run_slots
+    if _run_slots is None:
+        _run_slots = asyncio.Semaphore(max(1, settings.ENGINE_MAX_CONCURRENT_RUNS))
+    return _run_slots
+
+async def _execute_http_step(engine_run_id: str, cfg: Dict[str, Any]) -> str:
+    """Run one HTTP node for /v1/execute; returns the step status."""
+    def log(level: str, msg: str) -> None:
+        run_store.append_log(engine_run_id, level, msg)
+
+    url = cfg.get("url") or "https://httpbin.org/get"
+    method = str(cfg.get("method") or "GET").upper()
+    headers: Dict[str, Any] = cfg.get("headers") or {}
+    # Accept body in either 'json_body' (legacy) or 'body' (current UI textarea)
+    body_raw = cfg.get("json_body") or cfg.get("body") or None
+    json_body: Optional[Dict[str, Any]] = None
+    text_body: Optional[str] = None
+    if body_raw is not None:
+        if isinstance(body_raw, dict):
+            json_body = cast(Dict[str, Any], body_raw)
+        elif isinstance(body_raw, str):
+            # Try to parse as JSON; if fails treat as plain text
+            try:
+                parsed_obj = json.loads(body_raw)
+                if isinstance(parsed_obj, dict):
+                    json_body = parsed_obj  # type: ignore[arg-type]
+                else:
+                    text_body = body_raw
+            except Exception:  # pragma: no cover - best effort only
+                text_body = body_raw
+    req_started = time.time()
+    try:
+        # Async pooled client: no blocking call inside this handler.
+        resp = await http_clients.arequest(
+            method=method,
+            url=str(url),
+            headers=headers,
+            json=json_body,
+            content=text_body,
+            timeout=15.0,
+        )
+    except Exception as he:  # pragma: no cover
+        log("error", f"http error {method} {url}: {he}")
+        return "failed"
+
+    req_duration = int((time.time() - req_started) * 1000)
+    # Request body info (if any)
+    if json_body is not None or text_body is not None:
+        sent_desc = (
+            f"json keys={list(json_body.keys())[:5]}" if json_body else f"text {len(text_body or '')} chars"
+        )
+        log("info", f"http request body sent: {sent_desc}")
+    # Response summary line with method + duration + content type
+    resp_ct = resp.headers.get("content-type", "?")
+    log("info", f"http {method} {resp.status_code} {url} {req_duration}ms ct={resp_ct}")
+    # Response payload (best effort)
+    body_logged = False
+    if resp_ct.startswith("application/json"):
+        try:
+            response_data = resp.json()
+            serialized = json.dumps(response_data)
+            if len(serialized) > 800:
+                log("info", f"Response(JSON,truncated): {serialized[:800]}...")
+            else:
+                log("info", f"Response(JSON): {response_data}")
+            body_logged = True
+        except Exception as je:  # pragma: no cover
+            log("error", f"response json parse error: {je}")
+    if not body_logged:
+        txt = resp.text
+        if not txt:
+            log("info", "Response: <empty>")
+        else:
+            truncated = txt[:800] + "..." if len(txt) > 800 else txt
+            log("info", f"Response(Text): {truncated}")
+    return "succeeded"
+
+async def _run_dag(engine_run_id: str, dag: Dict[str, Any]) -> None:
+    """Execute a /v1/execute DAG (sequentially) and record progress in the run store."""
+    async with _run_slot():
+        try:
+            run_store.set_status(engine_run_id, "running")
+            steps: List[Dict[str, Any]] = dag.get("nodes", []) or []
+            failed = False
+            for idx, step in enumerate(steps):
+                step_dict: Dict[str, Any] = step
+                step_id = step_dict.get("id") or f"s{idx+1}"
+                step_type = step_dict.get("type") or "unknown"
+                started = time.time()
+                run_store.append_log(engine_run_id, "info", f"step {step_id} start {step_type}")
+                status = "succeeded"
+                # HTTP node execution: support both legacy 'http_request_node' and current UI 'http'
+                if step_type in ("http_request_node", "http"):
+                    status = await _execute_http_step(engine_run_id, step_dict.get("config", {}) or {})
+                duration = int((time.time() - started) * 1000)
+                run_store.append_step(engine_run_id, {"id": step_id, "status": status, "durationMs": duration})
+                run_store.append_log(engine_run_id, "info", f"step {step_id} done")
+                if status == "failed":
+                    failed = True
+                    break
+            run_store.set_status(engine_run_id, "failed" if failed else "succeeded")
+        except Exception as e:  # pragma: no cover
+            run_store.append_log(engine_run_id, "error", f"execution failed: {e}")
+            run_store.set_status(engine_run_id, "failed")
+        log_event("engine.execute.finished", engineRunId=engine_run_id)
+
 engine_router = APIRouter(prefix="/v1")
 
 @engine_router.post("/execute")
@@ -107,135 +238,22 @@ async def execute(payload: Dict[str, Any]) -> Dict[str, str]:
     engine_run_id = "eng_" + str(uuid.uuid4())
     run_id = payload.get("runId")
     dag: Dict[str, Any] = payload.get("dag", {}) or {}
-    rec = _new_run_record(engine_run_id, run_id, dag)
-    runs[engine_run_id] = rec
-    log_event("engine.execute.accepted", engineRunId=engine_run_id, runId=run_id)
-    # naive synchronous execution (sequential) for MVP
     try:
-        import httpx  # type: ignore
-        rec["status"] = "running"
-        steps: List[Dict[str, Any]] = dag.get("nodes", []) or []
-        for idx, step in enumerate(steps):
-            step_dict: Dict[str, Any] = step
-            step_id = step_dict.get("id") or f"s{idx+1}"
-            step_type = step_dict.get("type") or "unknown"
-            started = time.time()
-            rec["logs"].append({"ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), "level": "info", "msg": f"step {step_id} start {step_type}"})
-            status = "succeeded"
-            # HTTP node execution: support both legacy 'http_request_node' and current UI 'http'
-            if step_type in ("http_request_node", "http"):
-                cfg: Dict[str, Any] = step_dict.get("config", {}) or {}
-                url = cfg.get("url") or "https://httpbin.org/get"
-                method = str(cfg.get("method") or "GET").upper()
-                headers: Dict[str, Any] = cfg.get("headers") or {}
-                # Accept body in either 'json_body' (legacy) or 'body' (current UI textarea)
-                body_raw = cfg.get("json_body") or cfg.get("body") or None
-                json_body: Optional[Dict[str, Any]] = None
-                text_body: Optional[str] = None
-                if body_raw is not None:
-                    if isinstance(body_raw, dict):
-                        json_body = cast(Dict[str, Any], body_raw)
-                    elif isinstance(body_raw, str):
-                        # Try to parse as JSON; if fails treat as plain text
-                        try:
-                            parsed_obj = json.loads(body_raw)
-                            if isinstance(parsed_obj, dict):
-                                json_body = parsed_obj  # type: ignore[arg-type]
-                            else:
-                                text_body = body_raw
-                        except Exception:  # pragma: no cover - best effort only
-                            text_body = body_raw
-                req_started = time.time()
-                try:
-                    with httpx.Client(timeout=15.0) as client:
-                        resp = client.request(
-                            method=method,
-                            url=str(url),
-                            headers=headers,
-                            json=json_body,
-                            content=text_body,
-                        )
-                    req_duration = int((time.time() - req_started) * 1000)
-                    # Request body info (if any)
-                    if json_body is not None or text_body is not None:
-                        sent_desc = (
-                            f"json keys={list(json_body.keys())[:5]}" if json_body else f"text {len(text_body or '')} chars"
-                        )
-                        rec["logs"].append({
-                            "ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                            "level": "info",
-                            "msg": f"http request body sent: {sent_desc}"
-                        })
-                    # Response summary line with method + duration + content type
-                    resp_ct = resp.headers.get("content-type", "?")
-                    rec["logs"].append({
-                        "ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                        "level": "info",
-                        "msg": f"http {method} {resp.status_code} {url} {req_duration}ms ct={resp_ct}"
-                    })
-                    # Response payload (best effort)
-                    body_logged = False
-                    if resp_ct.startswith("application/json"):
-                        try:
-                            response_data = resp.json()
-                            serialized = json.dumps(response_data)
-                            if len(serialized) > 800:
-                                rec["logs"].append({
-                                    "ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                                    "level": "info",
-                                    "msg": f"Response(JSON,truncated): {serialized[:800]}..."
-                                })
-                            else:
-                                rec["logs"].append({
-                                    "ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                                    "level": "info",
-                                    "msg": f"Response(JSON): {response_data}"
-                                })
-                            body_logged = True
-                        except Exception as je:  # pragma: no cover
-                            rec["logs"].append({
-                                "ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                                "level": "error",
-                                "msg": f"response json parse error: {je}"
-                            })
-                    if not body_logged:
-                        txt = resp.text
-                        if not txt:
-                            rec["logs"].append({
-                                "ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                                "level": "info",
-                                "msg": "Response: <empty>"
-                            })
-                        else:
-                            truncated = txt[:800] + "..." if len(txt) > 800 else txt
-                            rec["logs"].append({
-                                "ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                                "level": "info",
-                                "msg": f"Response(Text): {truncated}"
-                            })
-                except Exception as he:  # pragma: no cover
-                    status = "failed"
-                    rec["logs"].append({
-                        "ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                        "level": "error",
-                        "msg": f"http error {method} {url}: {he}"
-                    })
-            duration = int((time.time() - started) * 1000)
-            rec["steps"].append({"id": step_id, "status": status, "durationMs": duration})
-            rec["logs"].append({"ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), "level": "info", "msg": f"step {step_id} done"})
-            if status == "failed":
-                rec["status"] = "failed"
-                break
-        if rec["status"] != "failed":
-            rec["status"] = "succeeded"
-    except Exception as e:  # pragma: no cover
-        rec["status"] = "failed"
-        rec["logs"].append({"ts": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), "level": "error", "msg": f"execution failed: {e}"})
+        run_store.create(_new_run_record(engine_run_id, run_id, dag))
+    except RunStoreFull:
+        # Back-pressure: every admitted run holds memory and a task until it finishes.
+        log_event("engine.execute.rejected", level="warning", runId=run_id, active=run_store.stats()["active"])
+        raise HTTPException(status_code=429, detail="too_many_runs", headers={"Retry-After": "1"})
+    log_event("engine.execute.accepted", engineRunId=engine_run_id, runId=run_id)
+    # Execute in the background; clients poll GET /v1/runs/{id} or stream /events.
+    task = asyncio.create_task(_run_dag(engine_run_id, dag))
+    _run_tasks.add(task)
+    task.add_done_callback(_run_tasks.discard)
     return {"engineRunId": engine_run_id}
 
 @engine_router.get("/runs/{engine_run_id}")
 async def get_run(engine_run_id: str):
-    rec = runs.get(engine_run_id)
+    rec = run_store.get(engine_run_id)
     if not rec:
         raise HTTPException(status_code=404, detail="not_found")
     return {
@@ -245,6 +263,36 @@ async def get_run(engine_run_id: str):
         "logs": rec["logs"],
     }
 
+@engine_router.get("/runs/{engine_run_id}/events")
+async def stream_run_events(engine_run_id: str, request: Request) -> StreamingResponse:
+    """Server-Sent Events: 'log', 'step' and 'status' records as they happen, then 'end'.
+
+    Reconnecting clients resume after the standard ``Last-Event-ID`` header.
+    """
+    if run_store.get(engine_run_id) is None:
+        raise HTTPException(status_code=404, detail="not_found")
+    try:
+        after = int(request.headers.get("last-event-id", "-1"))
+    except ValueError:
+        after = -1
+
+    async def event_stream() -> AsyncIterator[str]:
+        async for seq, event, data in run_store.subscribe(engine_run_id, after=after):
+            if await request.is_disconnected():
+                return
+            if seq < 0:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {seq}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        rec = run_store.get(engine_run_id) or {}
+        yield f"event: end\ndata: {json.dumps({'status': rec.get('status')})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 app.include_router(engine_router)
 
 # === Endpoints Router ===
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+"""
+Auth cache test (offline, temporary SQLite DB):
+- TTLCache: per-entry expiry and LRU eviction at maxsize.
+- remember_token never caches a token past its own ``exp``.
+- ORM updates/deletes of a User drop its cached principal (after_update/after_delete).
+- With the cache disabled, get_current_user falls through to session.get every time.
+
+Run from the engine root:  python tests/auth_cache_test.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Point the app at a throwaway SQLite file before any app module is imported.
+_db_dir = tempfile.mkdtemp(prefix="automateos-auth-cache-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'auth.db')}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+import time
+from typing import Any, List
+
+from sqlmodel import Session
+
+import app.api.v1.deps as deps
+from app.core.auth_cache import AuthCache, TTLCache, auth_cache
+from app.core.security import create_access_token
+from app.db.session import create_db_and_tables, engine
+from app.models.user import User
+from app.models.workflow import Workflow  # noqa: F401  (registers the tables User relates to)
+
+
+class CountingSession(Session):
+    """Session that records every ``get`` so tests can tell cache hits from DB reads."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.gets: List[Any] = []
+
+    def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:  # type: ignore[override]
+        self.gets.append(ident)
+        return super().get(entity, ident, **kwargs)
+
+
+def create_user(email: str) -> int:
+    with Session(engine) as s:
+        user = User(email=email, name="Cached", hashed_password="x")
+        s.add(user)
+        s.commit()
+        s.refresh(user)
+        assert user.id is not None
+        return user.id
+
+
+def test_ttl_expiry() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl_seconds=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.08)
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 1}, cache.stats()
+
+    # A shorter per-entry TTL wins; a longer one is clamped to the cache TTL; <= 0 is not stored.
+    cache = TTLCache(maxsize=10, ttl_seconds=0.05)
+    cache.set("short", 1, ttl_seconds=0.01)
+    cache.set("long", 2, ttl_seconds=3600)
+    cache.set("dead", 3, ttl_seconds=0)
+    time.sleep(0.02)
+    assert cache.get("short") is None and cache.get("long") == 2 and cache.get("dead") is None
+    time.sleep(0.05)
+    assert cache.get("long") is None
+
+
+def test_lru_eviction() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None, "least recently used entry should be evicted"
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["size"] == 2
+
+
+def test_token_ttl_clamped_to_exp() -> None:
+    cache = AuthCache(enabled=True, maxsize=10, ttl_seconds=60)
+    cache.remember_token("soon", 1, int(time.time()) + 2)
+    cache.remember_token("later", 2, int(time.time()) + 3600)
+    cache.remember_token("expired", 3, int(time.time()) - 5)
+    assert cache.user_id_for_token("soon") == 1 and cache.user_id_for_token("later") == 2
+    assert cache.user_id_for_token("expired") is None
+    time.sleep(2.1)
+    assert cache.user_id_for_token("soon") is None, "token cached past its exp"
+    assert cache.user_id_for_token("later") == 2
+
+
+def test_orm_writes_invalidate_principal(user_id: int) -> None:
+    auth_cache.clear()
+    with Session(engine) as s:
+        user = s.get(User, user_id)
+        assert user is not None
+        auth_cache.remember_user(user)
+        assert auth_cache.get_user(user_id) is not None
+
+        user.name = "Renamed"
+        s.add(user)
+        s.commit()
+        assert auth_cache.get_user(user_id) is None, "after_update should drop the principal"
+
+        auth_cache.remember_user(user)
+        assert auth_cache.get_user(user_id).name == "Renamed"  # type: ignore[union-attr]
+        s.delete(user)
+        s.commit()
+        assert auth_cache.get_user(user_id) is None, "after_delete should drop the principal"
+
+
+def test_cache_path_and_disabled_fallthrough(user_id: int) -> None:
+    token = create_access_token(user_id)
+    original = deps.auth_cache
+    try:
+        deps.auth_cache = AuthCache(enabled=True, maxsize=10, ttl_seconds=60)
+        with CountingSession(engine) as s:
+            assert deps.get_current_user(session=s, token=token).id == user_id
+            assert deps.get_current_user(session=s, token=token).id == user_id
+            assert s.gets == [user_id], s.gets  # second request served from the cache
+
+        # AUTH_CACHE_ENABLED=false: nothing is remembered, every request reads the row.
+        deps.auth_cache = AuthCache(enabled=False, maxsize=10, ttl_seconds=60)
+        with CountingSession(engine) as s:
+            for _ in range(3):
+                assert deps.get_current_user(session=s, token=token).id == user_id
+            assert s.gets == [user_id] * 3, s.gets
+        assert deps.auth_cache.stats()["tokens"]["size"] == 0
+        assert deps.auth_cache.stats()["users"]["size"] == 0
+    finally:
+        deps.auth_cache = original
+
+
+def main() -> None:
+    create_db_and_tables()
+    test_ttl_expiry()
+    test_lru_eviction()
+    test_token_ttl_clamped_to_exp()
+    test_cache_path_and_disabled_fallthrough(create_user("fallthrough@example.com"))
+    test_orm_writes_invalidate_principal(create_user("invalidate@example.com"))
+    print("Auth cache test passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+"""
+Blob store / output cap test (offline):
+- BlobStore: content-addressed dedup, reading blobs written with the other
+  compression setting, missing/invalid digests.
+- cap_output: small outputs untouched, oversized values moved to blobs.
+- HttpRequestNode against a local stub server: bodies over max_output_bytes are
+  streamed to the blob store, and only allowlisted response headers are kept.
+
+Run from the engine root:  python tests/blob_store_test.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Keep blobs in a throwaway directory before any app module is imported.
+_blob_dir = tempfile.mkdtemp(prefix="automateos-blobs-")
+os.environ["BLOB_STORE_DIR"] = _blob_dir
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, List
+
+from app.core.blob_store import BlobStore, blob_store, cap_output, is_blob_ref
+from app.core.config import settings
+from app.core.http_client import http_clients
+from app.engine.orchestrator import run_workflow
+from app.engine.nodes.http_request_node import HttpRequestNode
+
+LARGE_BODY = json.dumps({"items": ["x" * 64] * 200}).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """``/large`` returns LARGE_BODY, anything else a tiny JSON document; both with noisy headers."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        # The node sends its (empty) json_body; drain it so keep-alive stays in sync.
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = LARGE_BODY if self.path == "/large" else b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.send_header("Set-Cookie", "session=secret")
+        self.send_header("X-Custom", "kept-on-request")
+        for i in range(20):
+            self.send_header(f"X-Trace-{i}", "noise")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def stored_files(root: Path) -> List[Path]:
+    return [p for p in root.rglob("*") if p.is_file() and p.parent.name != "tmp"]
+
+
+def test_dedup(root: Path) -> None:
+    store = BlobStore(root)
+    first = store.put_bytes(b"hello blob" * 100, content_type="text/plain")
+    second = store.put_bytes(b"hello blob" * 100, content_type="text/plain")
+    assert first == second, (first, second)
+    assert first["size"] == 1000 and first["compressed"] is True, first
+    assert first["preview"].startswith("hello blob"), first
+    assert stored_files(root) == [store.path_for(first["$blob"])], stored_files(root)
+    assert not any((root / "tmp").iterdir()), "temp files left behind"
+    assert store.read_bytes(first["$blob"]) == b"hello blob" * 100
+
+
+def test_locate_across_compression(root: Path) -> None:
+    gz_store = BlobStore(root, compress=True)
+    raw_store = BlobStore(root, compress=False)
+    gz_ref = gz_store.put_bytes(b"written compressed")
+    raw_ref = raw_store.put_bytes(b"written uncompressed")
+    assert gz_store.path_for(gz_ref["$blob"]).suffix == ".gz"
+    assert raw_store.path_for(raw_ref["$blob"]).suffix != ".gz"
+    # Flipping BLOB_STORE_COMPRESS must not orphan existing blobs.
+    assert raw_store.read_bytes(gz_ref["$blob"]) == b"written compressed"
+    assert gz_store.read_bytes(raw_ref["$blob"]) == b"written uncompressed"
+    assert gz_store.exists(raw_ref["$blob"]) and raw_store.exists(gz_ref["$blob"])
+
+    missing = "sha256:" + "0" * 64
+    assert not gz_store.exists(missing)
+    try:
+        gz_store.open(missing)
+        raise AssertionError("missing blob should raise")
+    except FileNotFoundError:
+        pass
+    try:
+        gz_store.path_for("sha256:../../etc/passwd")
+        raise AssertionError("invalid digest should raise")
+    except ValueError:
+        pass
+
+
+def test_cap_output(root: Path) -> None:
+    store = BlobStore(root, preview_bytes=16)
+    small = {"status_code": 200, "text": "ok"}
+    assert cap_output(small, 1024, store) is small
+    assert cap_output({"text": "x" * 5000}, 0, store)["text"] == "x" * 5000
+
+    output = {"status_code": 200, "text": "y" * 5000, "json": {"big": "z" * 3000}}
+    capped = cap_output(output, 1024, store)
+    assert capped["status_code"] == 200
+    assert is_blob_ref(capped["text"]) and is_blob_ref(capped["json"]), capped
+    assert len(json.dumps(capped).encode("utf-8")) <= 1024, len(json.dumps(capped))
+    assert json.loads(store.read_bytes(capped["text"]["$blob"])) == output["text"]
+    assert json.loads(store.read_bytes(capped["json"]["$blob"])) == output["json"]
+    assert output["text"] == "y" * 5000, "input must not be modified"
+
+
+def test_http_over_budget(base_url: str) -> None:
+    node = HttpRequestNode(config={"url": f"{base_url}/large", "max_output_bytes": 1024})
+    out = node.execute({})
+    assert out["status_code"] == 200 and out["truncated"] is True and out["json"] is None, out
+    ref = out["body"]
+    assert is_blob_ref(ref) and ref["size"] == len(LARGE_BODY) and ref["contentType"] == "application/json", ref
+    assert blob_store.read_bytes(ref["$blob"]) == LARGE_BODY
+    assert out["text"] == ref["preview"]
+    # Only the allowlisted headers reach run state.
+    assert set(out["headers"]) == {"content-type", "content-length", "etag"}, out["headers"]
+
+    node = HttpRequestNode(config={"url": f"{base_url}/small", "response_headers": ["X-Custom"]})
+    out = node.execute({})
+    assert out["json"] == {"ok": True} and "truncated" not in out, out
+    assert out["headers"]["x-custom"] == "kept-on-request" and "set-cookie" not in out["headers"], out["headers"]
+
+    out = HttpRequestNode(config={"url": f"{base_url}/small", "response_headers": "*"}).execute({})
+    assert "set-cookie" in out["headers"] and "x-trace-19" in out["headers"], out["headers"]
+
+    for bad in ("all", ["ok", 1], {"x": 1}):
+        try:
+            HttpRequestNode.validate_config({"url": base_url, "response_headers": bad})
+            raise AssertionError(f"response_headers={bad!r} should be rejected")
+        except ValueError:
+            pass
+
+
+def test_step_budget_overrides_global(base_url: str) -> None:
+    original = settings.NODE_OUTPUT_MAX_BYTES
+    settings.NODE_OUTPUT_MAX_BYTES = 1024
+    try:
+        reads_items = {"type": "filter_node", "config": {"condition": "input_data['fetch']['json']['items'][199] == 'x' * 64"}}
+        for budget in (0, len(LARGE_BODY) * 4):
+            # The step allows more than the global cap: downstream still sees the full JSON.
+            fetch = {"id": "fetch", "type": "http_request_node", "config": {"url": f"{base_url}/large", "max_output_bytes": budget}}
+            state = run_workflow({"steps": [fetch, reads_items]})
+            assert not is_blob_ref(state["fetch"]["json"]), state["fetch"]
+
+        # Without its own budget the step falls back to the global one.
+        fetch = {"id": "fetch", "type": "http_request_node", "config": {"url": f"{base_url}/large"}}
+        state = run_workflow({"steps": [fetch]})
+        assert state["fetch"]["truncated"] is True and is_blob_ref(state["fetch"]["body"]), state["fetch"]
+    finally:
+        settings.NODE_OUTPUT_MAX_BYTES = original
+
+
+def main() -> None:
+    root = Path(tempfile.mkdtemp(prefix="automateos-blobstore-"))
+    test_dedup(root / "dedup")
+    test_locate_across_compression(root / "mixed")
+    test_cap_output(root / "cap")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        test_http_over_budget(base_url)
+        test_step_budget_overrides_global(base_url)
+    finally:
+        server.shutdown()
+        http_clients.close()
+    print("Blob store test passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+"""
+Orchestrator scheduling test (offline, no DB/Redis/network):
+- Registers a stub node that sleeps, records how many steps run at once and
+  which upstream outputs it was given.
+- Linear definitions (no depends_on) run strictly in order and every step sees
+  all previous outputs, as before the DAG scheduler existed.
+- DAG definitions run independent steps concurrently (bounded by
+  max_concurrency) and each step sees only its transitive upstream steps.
+- A failing step stops the run; an invalid max_concurrency is rejected at compile time.
+- A node mutating its config does not change the cached plan.
+
+Run from the engine root:  python tests/dag_scheduler_test.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from typing import Any, Dict, List
+
+from app.engine.nodes.base import BaseNode
+from app.engine.orchestrator import run_workflow
+from app.engine.plan import compile_workflow, plan_cache
+from app.engine.registry import node_registry
+
+
+class StubNode(BaseNode):
+    """Sleeps for config['sleep'] seconds and reports the upstream ids it saw."""
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    order: List[str] = []
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.active = cls.peak = 0
+        cls.order = []
+
+    def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            cls.order.append(self.config["name"])
+        try:
+            time.sleep(self.config.get("sleep", 0))
+            if self.config.get("fail"):
+                raise RuntimeError("boom")
+            seen = sorted(k for k in input_data if k != "stub_node")
+            return {"name": self.config["name"], "seen": seen}
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+class MutatingNode(BaseNode):
+    def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.config["calls"] = self.config.get("calls", 0) + 1
+        self.config["nested"]["touched"] = True
+        return {"calls": self.config["calls"]}
+
+
+node_registry.register("stub_node", StubNode)
+node_registry.register("mutating_node", MutatingNode)
+
+
+def step(name: str, depends_on: Any = None, **config: Any) -> Dict[str, Any]:
+    s: Dict[str, Any] = {"id": name, "type": "stub_node", "config": {"name": name, **config}}
+    if depends_on is not None:
+        s["depends_on"] = depends_on
+    return s
+
+
+def test_linear_unchanged() -> None:
+    StubNode.reset()
+    state = run_workflow({"steps": [step("a", sleep=0.02), step("b", sleep=0.02), step("c")]})
+    assert StubNode.order == ["a", "b", "c"], StubNode.order
+    assert StubNode.peak == 1, StubNode.peak
+    # Each step sees every earlier output; the type key holds the last one.
+    assert state["b"]["seen"] == ["a"], state["b"]
+    assert state["c"]["seen"] == ["a", "b"], state["c"]
+    assert state["stub_node"]["name"] == "c"
+
+
+def test_dag_concurrency_and_views() -> None:
+    # root -> (x, y, z) -> join ; x -> x2
+    definition = {
+        "max_concurrency": 3,
+        "steps": [
+            step("root"),
+            step("x", "root", sleep=0.2),
+            step("y", "root", sleep=0.2),
+            step("z", "root", sleep=0.2),
+            step("x2", "x"),
+            step("join", ["y", "z"]),
+        ],
+    }
+    StubNode.reset()
+    started = time.perf_counter()
+    state = run_workflow(definition)
+    elapsed = time.perf_counter() - started
+    assert StubNode.peak == 3, StubNode.peak
+    assert elapsed < 0.5, elapsed  # three 0.2s steps overlapped
+    assert state["x2"]["seen"] == ["root", "x"], state["x2"]
+    assert state["join"]["seen"] == ["root", "y", "z"], state["join"]
+    assert set(state) >= {"root", "x", "y", "z", "x2", "join"}
+
+    StubNode.reset()
+    run_workflow(definition, max_concurrency=1)
+    assert StubNode.peak == 1, StubNode.peak
+
+
+def test_failure_stops_downstream() -> None:
+    StubNode.reset()
+    try:
+        run_workflow({"steps": [step("a"), step("bad", "a", fail=True), step("after", "bad")]})
+    except RuntimeError as e:
+        assert "Step 2 (stub_node) failed" in str(e), e
+    else:
+        raise AssertionError("expected the failing step to stop the run")
+    assert "after" not in StubNode.order, StubNode.order
+
+
+def test_invalid_max_concurrency() -> None:
+    for bad in ("abc", -1, 2.5, True):
+        try:
+            compile_workflow({"max_concurrency": bad, "steps": [step("a")]})
+        except ValueError as e:
+            assert "'max_concurrency' must be a positive integer" in str(e), e
+        else:
+            raise AssertionError(f"max_concurrency={bad!r} should be rejected")
+    assert compile_workflow({"max_concurrency": "2", "steps": [step("a")]}).max_concurrency == 2
+
+
+def test_cached_plan_config_is_not_shared() -> None:
+    definition = {"steps": [{"type": "mutating_node", "config": {"nested": {}}}]}
+    calls = [run_workflow(definition, workflow_id=42)["mutating_node"]["calls"] for _ in range(3)]
+    assert calls == [1, 1, 1], calls
+    assert plan_cache.get_or_compile(definition, workflow_id=42).steps[0].config == {"nested": {}}
+
+
+def main() -> None:
+    test_linear_unchanged()
+    test_dag_concurrency_and_views()
+    test_failure_stops_downstream()
+    test_invalid_max_concurrency()
+    test_cached_plan_config_is_not_shared()
+    print("DAG scheduler test passed")
+
+
+if __name__ == "__main__":
+    main()
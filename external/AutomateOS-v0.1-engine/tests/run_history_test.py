@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+"""
+Run history API test (offline, temporary SQLite DB):
+- Keyset cursor paging over runs that share one created_at (ties broken by id).
+- GET /runs/meta, HEAD /runs and GET /runs/summary served from WorkflowRunSummary.
+- Startup backfill rebuilds summaries when they disagree with the runs table,
+  even if a worker already wrote a summary row for another workflow.
+
+Run from the engine root:  python tests/run_history_test.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Point the app at a throwaway SQLite file before any app module is imported.
+_db_dir = tempfile.mkdtemp(prefix="automateos-history-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'history.db')}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, delete, select
+
+from app.api.v1.deps import get_current_user
+from app.db.session import create_db_and_tables, engine, ensure_indexes_and_summaries
+from app.engine.run_summary import record_runs_finished, record_runs_started
+from app.models.user import User
+from app.models.workflow import Workflow, WorkflowRun, WorkflowRunSummary
+from main import app
+
+Status = WorkflowRun.WorkflowRunStatus
+TIED_AT = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def create_user_and_workflows() -> tuple[User, List[int]]:
+    with Session(engine, expire_on_commit=False) as s:
+        user = User(email="history@example.com", name="History", hashed_password="x")
+        s.add(user)
+        s.commit()
+        ids: List[int] = []
+        for i in range(2):
+            wf = Workflow(name=f"History {i}", definition={"steps": []}, user_id=user.id)
+            s.add(wf)
+            s.commit()
+            assert wf.id is not None
+            ids.append(wf.id)
+    return user, ids
+
+
+def add_runs(workflow_id: int) -> List[int]:
+    """5 runs with the same created_at plus one older run, recorded like the worker does."""
+    runs = [WorkflowRun(workflow_id=workflow_id, status=Status.RUNNING, logs={}, created_at=TIED_AT) for _ in range(5)]
+    runs.append(WorkflowRun(workflow_id=workflow_id, status=Status.RUNNING, logs={}, created_at=TIED_AT - timedelta(minutes=1)))
+    with Session(engine, expire_on_commit=False) as s:
+        s.add_all(runs)
+        record_runs_started(s, runs)
+        s.commit()
+        for i, run in enumerate(runs):
+            run.status = Status.FAILED if i == 0 else Status.SUCCESS
+            run.finished_at = run.created_at + timedelta(seconds=2)
+        s.add_all(runs)
+        record_runs_finished(s, runs)
+        s.commit()
+    return [run.id for run in runs if run.id is not None]
+
+
+def test_cursor_paging_with_tied_created_at(client: TestClient, workflow_id: int, run_ids: List[int]) -> None:
+    seen: List[int] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get(f"/api/v1/workflows/{workflow_id}/runs", params=params)
+        assert r.status_code == 200, r.text
+        seen.extend(run["id"] for run in r.json())
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    # Newest first; the tied runs come out by id DESC, none skipped or repeated.
+    tied, older = run_ids[:5], run_ids[5]
+    assert seen == sorted(tied, reverse=True) + [older], seen
+    assert pages == 4, pages
+
+    r = client.get(f"/api/v1/workflows/{workflow_id}/runs", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 422, r.text
+
+
+def test_counts_and_summary(client: TestClient, workflow_id: int, other_id: int) -> None:
+    r = client.get(f"/api/v1/workflows/{workflow_id}/runs/meta")
+    assert r.status_code == 200 and r.json() == {"total": 6}, r.text
+    r = client.get(f"/api/v1/workflows/{workflow_id}/runs/meta", params={"status_filter": "failed"})
+    assert r.json() == {"total": 1}, r.text
+
+    r = client.head(f"/api/v1/workflows/{workflow_id}/runs")
+    assert r.status_code == 204 and r.headers["X-Total-Count"] == "6", (r.status_code, r.headers)
+    r = client.head(f"/api/v1/workflows/{workflow_id}/runs", params={"status_filter": "success"})
+    assert r.headers["X-Total-Count"] == "5", r.headers
+
+    r = client.get(f"/api/v1/workflows/{workflow_id}/runs/summary")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["total"] == 6 and body["counts"]["success"] == 5 and body["counts"]["failed"] == 1, body
+    assert body["counts"]["running"] == 0, body
+    assert body["avg_duration_ms"] == 2000.0, body
+    assert datetime.fromisoformat(body["last_run_at"]).replace(tzinfo=None) == TIED_AT.replace(tzinfo=None), body
+
+    # A workflow without runs has zero counts rather than a 404.
+    r = client.get(f"/api/v1/workflows/{other_id}/runs/summary")
+    assert r.json()["total"] == 0 and r.json()["avg_duration_ms"] is None, r.text
+    r = client.head(f"/api/v1/workflows/{other_id}/runs")
+    assert r.headers["X-Total-Count"] == "0", r.headers
+    assert client.get("/api/v1/workflows/999999/runs/meta").status_code == 404
+
+
+def test_backfill_ignores_partial_summaries(workflow_id: int, other_id: int) -> None:
+    # Runs written before the summary table existed, then one run recorded by a
+    # worker for another workflow: the summary table is no longer empty.
+    with Session(engine) as s:
+        s.exec(delete(WorkflowRunSummary))  # type: ignore[call-overload]
+        s.commit()
+    with Session(engine) as s:
+        run = WorkflowRun(workflow_id=other_id, status=Status.RUNNING, logs={})
+        s.add(run)
+        record_runs_started(s, [run])
+        s.commit()
+
+    ensure_indexes_and_summaries()
+
+    with Session(engine) as s:
+        summaries = {row.workflow_id: row for row in s.exec(select(WorkflowRunSummary)).all()}
+    assert summaries[workflow_id].total_count == 6, summaries
+    assert summaries[workflow_id].success_count == 5, summaries
+    assert summaries[other_id].total_count == 1 and summaries[other_id].running_count == 1, summaries
+
+
+def main() -> None:
+    create_db_and_tables()
+    user, (workflow_id, other_id) = create_user_and_workflows()
+    run_ids = add_runs(workflow_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        with TestClient(app) as client:
+            test_cursor_paging_with_tied_created_at(client, workflow_id, run_ids)
+            test_counts_and_summary(client, workflow_id, other_id)
+    finally:
+        app.dependency_overrides.clear()
+    test_backfill_ignores_partial_summaries(workflow_id, other_id)
+    print("Run history test passed")
+
+
+if __name__ == "__main__":
+    main()
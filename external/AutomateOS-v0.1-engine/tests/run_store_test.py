@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+"""
+/v1/execute run store test (offline, no network):
+- Size bound evicts the least recently used finished run, never an active one.
+- Active runs are capped at max_active; /v1/execute answers 429 beyond that.
+- TTL eviction drops old finished runs.
+- Evicted runs are spilled to SQLite and replayed with the same event ids as
+  the live stream, so Last-Event-ID resumes correctly.
+- GET /v1/runs/{id}/events streams id/event/data records and ends with 'end'.
+
+Run from the engine root:  python tests/run_store_test.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="automateos-run-store-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'runs.db')}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from typing import Any, Dict, List, Tuple
+
+from fastapi.testclient import TestClient
+
+import main as app_main
+from app.core.run_store import RunStore, RunStoreFull
+
+
+def record(run_id: str) -> Dict[str, Any]:
+    return {"id": run_id, "status": "queued", "steps": [], "logs": []}
+
+
+def finish(store: RunStore, run_id: str) -> None:
+    store.set_status(run_id, "running")
+    store.append_log(run_id, "info", f"{run_id} step start")
+    store.append_step(run_id, {"id": "s1", "status": "succeeded", "durationMs": 1})
+    store.append_log(run_id, "info", f"{run_id} step done")
+    store.set_status(run_id, "succeeded")
+
+
+async def collect(store: RunStore, run_id: str, after: int = -1) -> List[Tuple[int, str, Dict[str, Any]]]:
+    return [item async for item in store.subscribe(run_id, after=after, heartbeat=0.1)]
+
+
+def test_size_bound_and_admission() -> None:
+    store = RunStore(max_runs=3, ttl_seconds=0, max_active=2)
+    store.create(record("a"))
+    store.create(record("b"))
+    try:
+        store.create(record("c"))
+    except RunStoreFull:
+        pass
+    else:
+        raise AssertionError("third active run should be rejected")
+
+    finish(store, "a")
+    store.create(record("c"))  # a finished -> a slot frees up
+    finish(store, "b")
+    finish(store, "c")
+    store.get_entry("a")  # a becomes most recently used
+    store.create(record("d"))
+    assert store.get("b") is None, "LRU finished run should be evicted"
+    assert store.get("a") is not None and store.get("d") is not None
+    assert store.stats()["active"] == 1 and store.stats()["inMemory"] == 3, store.stats()
+
+
+def test_ttl() -> None:
+    store = RunStore(max_runs=10, ttl_seconds=0.05)
+    store.create(record("old"))
+    finish(store, "old")
+    store.create(record("live"))
+    time.sleep(0.1)
+    store.evict()
+    assert store.get("old") is None
+    assert store.get("live") is not None, "active runs never expire"
+
+
+def test_spill_replay_keeps_event_ids() -> None:
+    store = RunStore(max_runs=1, ttl_seconds=0, spill_path=os.path.join(_tmp_dir, "spill.db"))
+    store.create(record("r1"))
+    finish(store, "r1")
+    live = asyncio.run(collect(store, "r1"))
+    assert [event for _, event, _ in live] == ["status", "log", "step", "log", "status"], live
+
+    store.create(record("r2"))  # evicts and spills r1
+    assert store.get_entry("r1") is None
+    assert store.get("r1")["status"] == "succeeded"
+    assert asyncio.run(collect(store, "r1")) == live
+    assert asyncio.run(collect(store, "r1", after=2)) == live[3:]
+    store.close()
+
+
+def test_sse_endpoint_and_429() -> None:
+    original = app_main.run_store
+    store = app_main.run_store = RunStore(max_runs=5, ttl_seconds=0, max_active=1)
+    try:
+        with TestClient(app_main.app) as client:
+            store.create(record("eng_busy"))
+            r = client.post("/v1/execute", json={"dag": {"nodes": []}})
+            assert r.status_code == 429 and r.headers["retry-after"] == "1", r.text
+
+            finish(store, "eng_busy")
+            with client.stream("GET", "/v1/runs/eng_busy/events", headers={"Last-Event-ID": "1"}) as resp:
+                body = "".join(resp.iter_text())
+            blocks = [b for b in body.split("\n\n") if b]
+            assert blocks[0].startswith("id: 2\nevent: step"), blocks
+            assert blocks[-1].startswith("event: end") and json.loads(blocks[-1].split("data: ", 1)[1]) == {"status": "succeeded"}
+
+            r = client.post("/v1/execute", json={"dag": {"nodes": []}})
+            assert r.status_code == 200, r.text
+            assert client.get("/v1/runs/missing/events").status_code == 404
+            assert app_main._run_slots is not None
+        # Loop-bound: dropped on shutdown so a later lifespan (new loop) gets a fresh one.
+        assert app_main._run_slots is None
+    finally:
+        app_main.run_store = original
+
+
+def main() -> None:
+    test_size_bound_and_admission()
+    test_ttl()
+    test_spill_replay_keeps_event_ids()
+    test_sse_endpoint_and_429()
+    print("Run store test passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+"""
+Bulk webhook ingestion test (offline):
+- Uses fakeredis as the Redis backend (pip install fakeredis) and a temporary SQLite DB.
+- POSTs /api/v1/webhooks/batch, checks the jobs were enqueued in batches,
+  drains the queue with an in-process rq SimpleWorker (burst mode), and checks
+  that every trigger produced a finished WorkflowRun.
+
+Run from the engine root:  python tests/webhook_batch_test.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Point the app at a throwaway SQLite file before any app module is imported.
+_db_dir = tempfile.mkdtemp(prefix="automateos-batch-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'batch.db')}"
+os.environ["WORKFLOW_BATCH_SIZE"] = "3"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from typing import Any, Dict, List
+
+import fakeredis
+from fastapi.testclient import TestClient
+from rq import Queue, SimpleWorker
+from sqlmodel import Session, select
+
+import app.core.queue as queue_module
+from app.db.session import create_db_and_tables, engine
+from app.models.user import User
+from app.models.workflow import Workflow, WorkflowRun
+from main import app
+
+
+def create_workflows(user_id: int) -> List[int]:
+    # Filter-only definitions: no network needed. The last one fails on purpose.
+    conditions = ["True", "1 == 1", "False"]
+    ids: List[int] = []
+    with Session(engine) as s:
+        for i, condition in enumerate(conditions):
+            definition: Dict[str, Any] = {"steps": [{"type": "filter_node", "config": {"condition": condition}}]}
+            wf = Workflow(name=f"Batch {i}", definition=definition, user_id=user_id)
+            s.add(wf)
+            s.commit()
+            s.refresh(wf)
+            assert wf.id is not None
+            ids.append(wf.id)
+    return ids
+
+
+def main() -> None:
+    create_db_and_tables()
+    with Session(engine) as s:
+        user = User(email="batch@example.com", name="Batch", hashed_password="x")
+        s.add(user)
+        s.commit()
+        s.refresh(user)
+        assert user.id is not None
+        user_id = user.id
+
+    fake_redis = fakeredis.FakeStrictRedis()
+    queue = Queue(connection=fake_redis)
+    queue_module.q = queue
+
+    wf_ids = create_workflows(user_id)
+    # 7 triggers (with repeats and one unknown id) -> 3 jobs of up to 3 ids each
+    trigger_ids = wf_ids + wf_ids + [999_999]
+
+    with TestClient(app) as client:
+        r = client.post("/api/v1/webhooks/batch", json={"workflow_ids": trigger_ids})
+        assert r.status_code == 202, r.text
+        body = r.json()
+        assert body["queued"] == len(trigger_ids) and body["jobs"] == 3, body
+        assert queue.count == 3, queue.count
+
+        r = client.post("/api/v1/webhooks/batch", json={"workflow_ids": []})
+        assert r.status_code == 422, r.text
+
+    SimpleWorker([queue], connection=fake_redis).work(burst=True)
+    assert queue.count == 0
+
+    with Session(engine) as s:
+        runs = s.exec(select(WorkflowRun)).all()
+    statuses = sorted(str(getattr(run.status, "value", run.status)) for run in runs)
+    assert len(runs) == 6, statuses
+    assert statuses == ["failed", "failed", "success", "success", "success", "success"], statuses
+    assert all(run.finished_at is not None for run in runs)
+    print("Bulk webhook batch test passed:", statuses)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+"""
+Draining worker test (offline):
+- Uses fakeredis (requirements-dev.txt) and a temporary SQLite DB.
+- Enqueues single-workflow webhook jobs and runs app.engine.batch_worker.BatchingWorker
+  in burst mode; checks the jobs ran in batches of WORKFLOW_BATCH_SIZE, that every
+  RQ job finished on its own, and that each trigger produced one finished WorkflowRun.
+- A forked work horse that ends with os._exit still writes the job's log records.
+
+Run from the engine root:  python tests/worker_batching_test.py
+"""
+
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+# Point the app at a throwaway SQLite file before any app module is imported.
+_db_dir = tempfile.mkdtemp(prefix="automateos-drain-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'drain.db')}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from typing import Any, Dict, List
+
+import fakeredis
+from rq import Callback, Queue
+from rq.job import JobStatus
+from rq.timeouts import JobTimeoutException, UnixSignalDeathPenalty
+from sqlmodel import Session, delete, select
+
+import app.engine.tasks as tasks
+from app.core.config import settings
+from app.core.queue import enqueue_workflow_batches
+from app.core.structured_log import event_logger
+from app.db.session import create_db_and_tables, engine
+from app.engine.batch_worker import BatchingWorker
+from app.engine.run_summary import rebuild_run_summaries
+from app.models.user import User
+from app.models.workflow import Workflow, WorkflowRun, WorkflowRunSummary
+
+SINGLE = "app.engine.tasks.process_workflow"
+
+
+def create_workflows() -> List[int]:
+    with Session(engine) as s:
+        user = User(email="drain@example.com", name="Drain", hashed_password="x")
+        s.add(user)
+        s.commit()
+        s.refresh(user)
+        ids: List[int] = []
+        # Filter-only definitions: no network needed. The last one fails on purpose.
+        for i, condition in enumerate(["True", "1 == 1", "False"]):
+            definition: Dict[str, Any] = {"steps": [{"type": "filter_node", "config": {"condition": condition}}]}
+            wf = Workflow(name=f"Drain {i}", definition=definition, user_id=user.id)
+            s.add(wf)
+            s.commit()
+            s.refresh(wf)
+            assert wf.id is not None
+            ids.append(wf.id)
+    return ids
+
+
+def record_batches(calls: List[List[int]]):
+    original = tasks.process_workflow_batch
+
+    def wrapper(workflow_ids: List[int]):
+        calls.append(list(workflow_ids))
+        return original(workflow_ids)
+
+    return wrapper
+
+
+def test_drains_single_jobs_in_batches(wf_ids: List[int]) -> None:
+    fake_redis = fakeredis.FakeStrictRedis()
+    queue = Queue(connection=fake_redis)
+    # 7 single triggers (one unknown id) with a bulk job in between.
+    singles = wf_ids + wf_ids + [999_999]
+    jobs = [queue.enqueue(SINGLE, wid) for wid in singles[:4]]
+    bulk = queue.enqueue("app.engine.tasks.process_workflow_batch", [wf_ids[0]])
+    jobs += [queue.enqueue(SINGLE, wid) for wid in singles[4:]]
+
+    calls: List[List[int]] = []
+    original = tasks.process_workflow_batch
+    tasks.process_workflow_batch = record_batches(calls)
+    try:
+        worker = BatchingWorker([queue], connection=fake_redis, batch_size=3)
+        worker.work(burst=True)
+    finally:
+        tasks.process_workflow_batch = original
+
+    assert queue.count == 0, queue.count
+    # Batches of 3 skip over the bulk job, which still runs on its own; the last
+    # single job has nothing left to batch with and runs as plain process_workflow.
+    assert calls == [singles[0:3], singles[3:6], [wf_ids[0]]], calls
+    for job in jobs + [bulk]:
+        assert job.get_status(refresh=True) == JobStatus.FINISHED, (job.id, job.get_status())
+    assert queue.started_job_registry.count == 0
+    assert queue.failed_job_registry.count == 0
+    assert queue.intermediate_queue.get_job_ids() == []
+
+    with Session(engine) as s:
+        runs = s.exec(select(WorkflowRun)).all()
+    statuses = sorted(str(getattr(run.status, "value", run.status)) for run in runs)
+    # 6 known single triggers + 1 bulk trigger; the unknown id is skipped.
+    assert statuses == ["failed", "failed", "success", "success", "success", "success", "success"], statuses
+    assert all(run.finished_at is not None for run in runs)
+
+
+def test_batch_error_fails_every_claimed_job(wf_ids: List[int]) -> None:
+    fake_redis = fakeredis.FakeStrictRedis()
+    queue = Queue(connection=fake_redis)
+    jobs = [queue.enqueue(SINGLE, wid) for wid in wf_ids]
+
+    def broken(workflow_ids: List[int]):
+        raise RuntimeError("database unavailable")
+
+    original = tasks.process_workflow_batch
+    tasks.process_workflow_batch = broken
+    try:
+        BatchingWorker([queue], connection=fake_redis, batch_size=10).work(burst=True)
+    finally:
+        tasks.process_workflow_batch = original
+
+    for job in jobs:
+        assert job.get_status(refresh=True) == JobStatus.FAILED, (job.id, job.get_status())
+    assert queue.failed_job_registry.count == len(jobs)
+    assert queue.started_job_registry.count == 0
+
+
+def test_claim_is_atomic_and_recoverable(wf_ids: List[int]) -> None:
+    fake_redis = fakeredis.FakeStrictRedis()
+    queue = Queue(connection=fake_redis)
+    job = queue.enqueue(SINGLE, wf_ids[0])
+    first = BatchingWorker([queue], connection=fake_redis)
+    second = BatchingWorker([queue], connection=fake_redis)
+
+    assert first._claim(queue, job.id) is True
+    assert second._claim(queue, job.id) is False
+    # Claimed but not started yet (e.g. the worker died here): the id sits in the
+    # intermediate queue, where RQ's cleanup finds it, not in limbo.
+    assert queue.count == 0
+    assert queue.intermediate_queue.get_job_ids() == [job.id]
+
+
+CALLBACK_RESULTS: List[Any] = []
+
+
+def remember_success(job: Any, connection: Any, result: Any, *args: Any, **kwargs: Any) -> None:
+    CALLBACK_RESULTS.append(job.id)
+
+
+def test_jobs_with_callbacks_are_not_batched(wf_ids: List[int]) -> None:
+    fake_redis = fakeredis.FakeStrictRedis()
+    queue = Queue(connection=fake_redis)
+    plain = queue.enqueue(SINGLE, wf_ids[0])
+    with_callback = queue.enqueue(SINGLE, wf_ids[0], on_success=Callback(remember_success))
+
+    calls: List[List[int]] = []
+    original = tasks.process_workflow_batch
+    tasks.process_workflow_batch = record_batches(calls)
+    try:
+        BatchingWorker([queue], connection=fake_redis, batch_size=10).work(burst=True)
+    finally:
+        tasks.process_workflow_batch = original
+
+    assert calls == [], calls
+    assert CALLBACK_RESULTS == [with_callback.id], CALLBACK_RESULTS
+    assert plain.get_status(refresh=True) == with_callback.get_status(refresh=True) == JobStatus.FINISHED
+
+
+def slow_for(slow_id: int, seconds: float):
+    """run_workflow stand-in: ``slow_id`` takes ``seconds``, every other workflow returns at once."""
+    def run_workflow(definition: Dict[str, Any], workflow_id: int | None = None) -> Dict[str, Any]:
+        if workflow_id == slow_id:
+            time.sleep(seconds)
+        return {"ok": True}
+
+    return run_workflow
+
+
+def batch_runs() -> List[WorkflowRun]:
+    with Session(engine) as s:
+        return list(s.exec(select(WorkflowRun).order_by(WorkflowRun.id)).all())  # type: ignore[arg-type]
+
+
+def reset_runs() -> None:
+    with Session(engine) as s:
+        s.exec(delete(WorkflowRun))  # type: ignore[call-overload]
+        s.commit()
+        rebuild_run_summaries(s)
+
+
+def test_batch_runs_keep_their_own_finish_time(wf_ids: List[int]) -> None:
+    fast, slow = wf_ids[0], wf_ids[1]
+    original = tasks.run_workflow
+    tasks.run_workflow = slow_for(slow, 0.4)
+    try:
+        tasks.process_workflow_batch([fast, slow])
+    finally:
+        tasks.run_workflow = original
+
+    durations = {run.workflow_id: (run.finished_at - run.created_at).total_seconds() for run in batch_runs()}  # type: ignore[operator]
+    assert durations[slow] >= 0.4, durations
+    assert durations[fast] < 0.2, durations
+
+
+def test_batch_timeout_fails_unfinished_runs(wf_ids: List[int]) -> None:
+    fast, slow = wf_ids[0], wf_ids[1]
+    original = tasks.run_workflow
+    tasks.run_workflow = slow_for(slow, 3)
+    try:
+        with UnixSignalDeathPenalty(1, JobTimeoutException):
+            tasks.process_workflow_batch([fast, slow])
+        raise AssertionError("the batch should have timed out")
+    except JobTimeoutException:
+        pass
+    finally:
+        tasks.run_workflow = original
+
+    runs = {run.workflow_id: run for run in batch_runs()}
+    assert runs[fast].status == WorkflowRun.WorkflowRunStatus.SUCCESS, runs[fast]
+    assert runs[slow].status == WorkflowRun.WorkflowRunStatus.FAILED and runs[slow].finished_at is not None, runs[slow]
+    assert "timeout" in runs[slow].logs["error"], runs[slow].logs
+    with Session(engine) as s:
+        summary = s.get(WorkflowRunSummary, slow)
+        assert summary is not None and summary.running_count == 0 and summary.failed_count == 1, summary
+
+
+def test_bulk_jobs_get_a_scaled_timeout() -> None:
+    queue = Queue(connection=fakeredis.FakeStrictRedis())
+    jobs = enqueue_workflow_batches(list(range(25)), queue=queue, batch_size=10)
+    rounds = [math.ceil(size / settings.WORKFLOW_MAX_CONCURRENCY) for size in (10, 10, 5)]
+    assert [job.timeout for job in jobs] == [Queue.DEFAULT_TIMEOUT * n for n in rounds], [job.timeout for job in jobs]
+
+
+class SlowPipe:
+    """Log stream that takes a while per write, like a busy log collector."""
+
+    def __init__(self, fd: int) -> None:
+        self.file = os.fdopen(fd, "w")
+
+    def write(self, text: str) -> None:
+        time.sleep(0.2)
+        self.file.write(text)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+
+def test_forked_horse_keeps_its_log_records(wf_ids: List[int]) -> None:
+    if not hasattr(os, "fork"):
+        return
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Work horse: run the jobs, then exit the way RQ does.
+        code = 1
+        try:
+            os.close(read_fd)
+            event_logger.stream = SlowPipe(write_fd)  # type: ignore[assignment]
+            engine.dispose(close=False)
+            tasks.process_workflow(wf_ids[0])
+            tasks.process_workflow_batch(wf_ids[:2])
+            code = 0
+        finally:
+            os._exit(code)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        output = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0, status
+    events = [json.loads(line)["event"] for line in output.splitlines()]
+    assert events.count("worker.job.received") == 1 and events.count("worker.batch.received") == 1, events
+    assert events.count("worker.workflow.succeeded") == 3, events
+
+
+def main() -> None:
+    create_db_and_tables()
+    wf_ids = create_workflows()
+    test_drains_single_jobs_in_batches(wf_ids)
+    reset_runs()
+    test_batch_error_fails_every_claimed_job(wf_ids)
+    test_claim_is_atomic_and_recoverable(wf_ids)
+    test_jobs_with_callbacks_are_not_batched(wf_ids)
+    reset_runs()
+    test_batch_runs_keep_their_own_finish_time(wf_ids)
+    reset_runs()
+    test_batch_timeout_fails_unfinished_runs(wf_ids)
+    test_bulk_jobs_get_a_scaled_timeout()
+    reset_runs()
+    test_forked_horse_keeps_its_log_records(wf_ids)
+    print("Draining worker test passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,14 @@
 import os
 import redis
 from redis import Redis
-from rq import Worker, Queue
+from rq import Worker, SimpleWorker, Queue
+
+from app.core.config import settings
+from app.core.http_client import http_clients
+from app.core.metrics import metrics, process_gauges, queue_depth_collector, start_metrics_server
+from app.core.structured_log import event_logger, log_event
+from app.db.session import create_db_and_tables
+from app.engine.batch_worker import BatchingWorker
 
 # The queues the worker will listen to.
 listen = ['default']
@@ -13,11 +20,36 @@ listen = ['default']
 redis_url = os.getenv('REDIS_URL', 'redis://redis:6379')
 conn: Redis = redis.from_url(redis_url)
 
+# Run jobs in this process (SimpleWorker) so the HTTP pool and compiled plan cache
+# are reused between jobs. Set WORKER_FORK=1 to fork a work horse per job instead.
+fork_per_job = os.getenv('WORKER_FORK', '0') == '1'
+
+
 if __name__ == '__main__':
+    # Jobs write WorkflowRun and WorkflowRunSummary rows; do not depend on the API having started first.
+    create_db_and_tables()
+
     # Create a list of Queue objects to listen to.
     queues = [Queue(name, connection=conn) for name in listen]
     
     # Create a new worker that listens on the specified queues.
-    worker = Worker(queues, connection=conn)
+    if fork_per_job:
+        worker_class = Worker
+    else:
+        # Without fork, drain queued process_workflow jobs in batches (see app/engine/batch_worker.py).
+        worker_class = BatchingWorker if settings.WORKER_DRAIN_BATCH else SimpleWorker
+    worker = worker_class(queues, connection=conn)
+    if metrics.enabled and settings.WORKER_METRICS_PORT:
+        # Node/run metrics are recorded in this process, so each worker serves its own.
+        metrics.register_collector(process_gauges)
+        for queue in queues:
+            metrics.register_collector(queue_depth_collector(queue))
+        start_metrics_server(settings.WORKER_METRICS_PORT)
+        print(f"Worker metrics on :{settings.WORKER_METRICS_PORT}/metrics")
     print("Starting Worker. Press Ctrl+C to stop")
-    worker.work()
\ No newline at end of file
+    try:
+        worker.work()
+    finally:
+        log_event("worker.http.pool.stats", **http_clients.stats())
+        http_clients.close()
+        event_logger.close()
\ No newline at end of file